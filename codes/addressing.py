@@ -43,7 +43,7 @@ class Access:
 
             if f_type == "mem":
                 # Try to load directly from memory if addr is a direct memory address (int)
-                if isinstance(addr, int) and addr in memory.data:
+                if isinstance(addr, int) and (addr in memory.data or 0 <= addr < memory.max_size):
                     return memory.load(addr, isCode=is_code)
                 # Or if it's a string representation of a memory address
                 elif isinstance(addr, str):
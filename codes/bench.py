@@ -0,0 +1,130 @@
+# bench.py
+"""
+Throughput benchmarks on a generated workload (see workload.py), each measured on its own:
+compile (source lines/s through Instruction.encodeProgram), interpreter (instructions/s in
+Program.run) and number conversion (round trips/s through Precision.dec2spbin/spbin2dec).
+Results are medians over --runs samples taken after one warm-up sample; compare exits with 1
+when a metric got slower by more than --threshold.
+
+Usage: python bench.py [--size N] [--loop-depth D] [--loop-count C] [--call-depth D] [--seed S] [--runs N] [--json results.json]
+       python bench.py compare old.json new.json [--threshold 0.1]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+
+from compiler import Instruction
+from convert import Precision
+from run import Program
+from workload import generate
+
+VERSION = 1
+conversion_values = 2000
+
+def quiet():
+    # preEncode, Program and EOP print; keep that out of the timings' output
+    return contextlib.redirect_stdout(io.StringIO())
+
+def benchCompile(workload, runs):
+    samples = []
+    for _ in range(runs + 1):
+        with quiet():
+            started = time.perf_counter()
+            Instruction.encodeProgram(workload.lines)
+            samples.append(len(workload.lines) / (time.perf_counter() - started))
+    return statistics.median(samples[1:])
+
+def benchInterpreter(workload, runs):
+    with quiet():
+        encoded = Program(workload.lines).encoded
+    samples = []
+    for _ in range(runs + 1):
+        with quiet():
+            program = Program.fromImage(encoded)
+            started = time.perf_counter()
+            try:
+                program.run()
+            except SystemExit:
+                pass
+            samples.append(workload.executed / (time.perf_counter() - started))
+    return statistics.median(samples[1:])
+
+def benchPrecision(runs, seed):
+    rng = random.Random(seed)
+    values = [round(rng.uniform(-1000, 1000), 2) for _ in range(conversion_values)]
+    samples = []
+    for _ in range(runs + 1):
+        started = time.perf_counter()
+        for value in values:
+            Precision.spbin2dec(Precision.dec2spbin(value))
+        samples.append(len(values) / (time.perf_counter() - started))
+    return statistics.median(samples[1:])
+
+def compare(old_path, new_path, threshold):
+    """Prints new/old for every metric (higher is better); returns the names of regressed metrics."""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    if old["config"] != new["config"]:
+        print("Warning: the results were measured on different workloads")
+    regressed = []
+    for name, before in old["results"].items():
+        if name not in new["results"]:
+            continue
+        ratio = new["results"][name] / before
+        flag = ""
+        if ratio < 1 - threshold:
+            regressed.append(name)
+            flag = "  REGRESSION"
+        print(f"{name}: {before:.1f} -> {new['results'][name]:.1f} ({ratio:.2f}x){flag}")
+    return regressed
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "compare":
+        parser = argparse.ArgumentParser(prog="bench.py compare")
+        parser.add_argument("old")
+        parser.add_argument("new")
+        parser.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown (0.1 = 10%%)")
+        args = parser.parse_args(sys.argv[2:])
+        sys.exit(1 if compare(args.old, args.new, args.threshold) else 0)
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=64, help="instructions per loop body")
+    parser.add_argument("--loop-depth", type=int, default=2)
+    parser.add_argument("--loop-count", type=int, default=4)
+    parser.add_argument("--call-depth", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    config = {"size": args.size, "loop_depth": args.loop_depth, "loop_count": args.loop_count,
+              "call_depth": args.call_depth, "seed": args.seed, "runs": args.runs}
+    workload = generate(args.size, loop_depth=args.loop_depth, loop_count=args.loop_count,
+                        call_depth=args.call_depth, seed=args.seed)
+    workload.prepare()
+    try:
+        results = {
+            "compile_lines_per_second": benchCompile(workload, args.runs),
+            "interpreter_instructions_per_second": benchInterpreter(workload, args.runs),
+            "precision_round_trips_per_second": benchPrecision(args.runs, args.seed),
+        }
+    finally:
+        workload.release()
+    print(f"Workload: {len(workload.lines)} lines, {workload.executed} instructions executed")
+    for name, value in results.items():
+        print(f"{name}: {value:.1f}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"version": VERSION, "python": platform.python_version(), "config": config, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# bench_startup.py
+"""
+Startup-time benchmark: a fresh interpreter imports run.py, loads a two-line program and
+executes its first instruction. Each sample runs in its own process so imports are never cached.
+
+Usage: python bench_startup.py [--runs N] [--json results.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROBE = """
+import contextlib, io, time
+t0 = time.perf_counter()
+from run import Program
+t1 = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    program = Program(["MOV #1, R1", "EOP"])
+    t2 = time.perf_counter()
+    program.step()
+t3 = time.perf_counter()
+print(t1 - t0, t2 - t1, t3 - t2)
+"""
+
+def sample():
+    """Returns (process, import, load, first_instruction) seconds for one fresh interpreter."""
+    started = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=os.path.dirname(os.path.abspath(__file__)),
+                         capture_output=True, text=True, check=True).stdout
+    process = time.perf_counter() - started
+    return (process, *map(float, out.split()))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--json", help="also write the medians to this file")
+    args = parser.parse_args()
+
+    samples = [sample() for _ in range(args.runs)]
+    names = ["process", "import", "load", "first_instruction"]
+    medians = {name: statistics.median(column) for name, column in zip(names, zip(*samples))}
+    for name, value in medians.items():
+        print(f"{name}: {value * 1000:.3f} ms")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"runs": args.runs, "median_seconds": medians}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
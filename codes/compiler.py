@@ -16,151 +16,232 @@ operations = [
 # Category Codes are derived from the index within the 'operations' group, formatted to 5 bits.
 operationCodes_EW = ["00", "01", "10", "11"]
 
+# Full opcode bits (E/W bits + 5-bit category code) of every mnemonic, e.g. "MOV" -> "0100000".
+opcode_bits = {op: operationCodes_EW[i] + format(group.index(op), '05b') for i, group in enumerate(operations) for op in group}
+
+# Mnemonic of every opcode bit pattern, for decode.
+opcode_names = {bits: op for op, bits in opcode_bits.items()}
+
+# Opcode and operands of an instruction line: the runs between whitespace and commas.
+token_source = r"[^\s,]+"
+
+# Operand grammar; alternatives are tried in this order and the named group that matched gives the mode.
+operand_source = r"""
+      (?P<register>[RI][+-]?\d+)                 # R# and I# (register direct)
+    | \*(?P<register_indirect>R[+-]?\d+)         # *R#
+    | \#?(?P<immediate>[+-]?(?:\d+\.?\d*|\.\d+))  # #value or a bare number
+    | \[(?P<indirect>.*)\]                       # [address], [R#] or [label]
+    | (?P<indexed>A[+-]?\d+)                     # A#
+    | (?P<direct>.+)                             # Labels/variables like START, M1
+"""
+
+# Compiled on first use: importing 're' and compiling the grammar would otherwise add to every 'import run'.
+token_pattern = None
+operand_pattern = None
+
+def tokenPattern():
+    global token_pattern
+    if token_pattern is None:
+        import re
+        token_pattern = re.compile(token_source)
+    return token_pattern
+
+def operandPattern():
+    global operand_pattern
+    if operand_pattern is None:
+        import re
+        operand_pattern = re.compile(operand_source, re.VERBOSE)
+    return operand_pattern
+
+register_modes = {"register": AddressingMode.register(None), "register_indirect": AddressingMode.register_indirect(None),
+                  "indexed": AddressingMode.indexed(None)}
+
+# parseOperand results by operand spelling. Labels and Length.opAddr can change between programs,
+# so encodeProgram clears it before encoding.
+operand_cache = {}
+
 class Instruction:
     @staticmethod
     def getAddressingMode(operand):
         """
-        Converts an operand string into its 3-bit addressing mode code by calling
-        the appropriate static method from AddressingMode.
+        Converts an operand string into its 3-bit addressing mode code (see parseOperand).
         """
-        if operand is None or operand == "None":
-            return AddressingMode.register(None) # Default to register mode for no operand
-
-        # Register Direct (R#)
-        elif operand.startswith("R") and Value.isInteger(operand[1:]):
-            return AddressingMode.register(operand)
-        # Register Indirect (*R#)
-        elif operand.startswith("*R") and Value.isInteger(operand[2:]):
-            return AddressingMode.register_indirect(operand)
-        # Immediate (#value or just a number)
-        elif (operand.startswith("#") and Value.isNumber(operand[1:])) or \
-             (Value.isNumber(operand) and not (operand.startswith('M') or operand.startswith('A') or operand.startswith('I'))):
-            return AddressingMode.immediate(operand)
-        # Indirect ([address] or [R#])
-        elif operand.startswith("[") and operand.endswith("]"):
-            return AddressingMode.indirect(operand)
-        # Indexed (A#)
-        elif operand.startswith("A") and Value.isInteger(operand[1:]):
-            return AddressingMode.indexed(operand)
-        # Special (I# for Index Registers) - often treated as direct register access for mode purposes
-        elif operand.startswith("I") and Value.isInteger(operand[1:]):
-            return AddressingMode.register(operand) # Treated as register direct for I#
-        # Direct (label/variable names like START, END, M1 etc.)
-        elif operand in variable:
-            return AddressingMode.direct(operand)
-        # Autoincrement/Autodecrement (assuming a specific syntax, e.g., R#+ or -R#)
-        # If your ISA uses these, you'd add conditions here and call AddressingMode.autoinc/autodec
-        # For example:
-        # elif operand.endswith("+") and operand.startswith("R") and Value.isInteger(operand[1:-1]):
-        #     return AddressingMode.autoinc(operand[:-1])
-        # elif operand.startswith("-R") and Value.isInteger(operand[2:]):
-        #     return AddressingMode.autodec(operand[1:])
-        else:
-            raise ValueError(f"Unknown addressing mode for operand: {operand}")
+        return Instruction.parseOperand(operand)[0]
 
     @staticmethod
     def encodeOp(operand):
         """
-        Encodes an operand into its 8-bit address/value representation.
-        Handles registers, immediate values, direct addresses (labels/variables), and indirect.
+        Encodes an operand into its Length.opAddr-bit address/value representation (8 bits by default).
+        Handles registers, immediate values, direct addresses (labels/variables), and indirect (see parseOperand).
+        """
+        return Instruction.parseOperand(operand)[1]
+
+    @staticmethod
+    def parseOperand(operand):
+        """
+        Classifies and encodes an operand with a single match of the operand grammar (operandPattern()).
+        Returns (3-bit mode, Length.opAddr-bit address/value). Results are kept in operand_cache
+        by spelling, so repeated operands are only parsed once per encodeProgram call.
         """
+        parsed = operand_cache.get(operand)
+        if parsed is not None:
+            return parsed
+
+        addr_format = f"0{Length.opAddr}b"
         if operand is None or operand == "None":
-            return "00000000" # All zeros for no operand
-
-        # Immediate values (e.g., "10", "#5")
-        if (operand.startswith("#") and Value.isNumber(operand[1:])) or Value.isNumber(operand):
-            val_str = operand[1:] if operand.startswith("#") else operand
-            value = int(val_str)
-            if not (0 <= value < 2**8): # Assuming 8-bit unsigned range for values
-                raise ValueError(f"Immediate value {value} out of 8-bit range for operand: {operand}")
-            return format(value, '08b')
-
-        # Register direct (R#), Register Indirect (*R#), Indexed (A#), Special (I#)
-        # For these, the 8-bit part is the numeric address of the register itself.
-        elif (operand.startswith("R") and Value.isInteger(operand[1:])) or \
-             (operand.startswith("*R") and Value.isInteger(operand[2:])) or \
-             (operand.startswith("A") and Value.isInteger(operand[1:])) or \
-             (operand.startswith("I") and Value.isInteger(operand[1:])):
-            # If it's *R#, get the R# part
-            reg_name = operand[1:] if operand.startswith("*") else operand
-            if reg_name not in variable:
-                raise ValueError(f"Register '{reg_name}' not defined in variable table for operand: {operand}")
-            return format(variable[reg_name], '08b') # Get the numeric address of the register
-
-        # Direct addressing (labels/variables like START, END, M1)
-        elif operand in variable:
-            # For direct addressing, the operand itself is the symbolic name (e.g., "START").
-            # Its value in 'variable' is the actual numeric memory address.
-            return format(variable[operand], '08b')
-
-        # Indirect addressing ([address] or [R#])
-        elif operand.startswith("[") and operand.endswith("]"):
-            inner_operand = operand[1:-1] # Get content inside brackets
-            # The inner operand can be a numeric address, a register name, or a label.
-            # Recursively call encodeOp for the inner part to get its address.
-            try:
-                return Instruction.encodeOp(inner_operand) # This will resolve to an 8-bit binary string
-            except Exception as e:
-                raise ValueError(f"Error encoding inner indirect operand '{inner_operand}' for operand '{operand}': {e}")
+            parsed = (AddressingMode.register(None), format(0, addr_format)) # All zeros for no operand
         else:
-            raise ValueError(f"Unrecognized operand for encoding: {operand}")
+            match = operandPattern().fullmatch(operand)
+            if match is None:
+                raise ValueError(f"Unknown addressing mode for operand: {operand}")
+            kind = match.lastgroup
+            text = match.group(kind)
+
+            if kind == "immediate":
+                if not Value.isInteger(text):
+                    raise ValueError(f"Immediate value must be an integer for operand: {operand}")
+                value = int(text)
+                if not (0 <= value < 2**Length.opAddr): # Unsigned range of the address field
+                    raise ValueError(f"Immediate value {value} out of {Length.opAddr}-bit range for operand: {operand}")
+                parsed = (AddressingMode.immediate(None), format(value, addr_format))
+
+            elif kind == "indirect":
+                # The inner operand can be a numeric address, a register name, or a label.
+                try:
+                    inner_addr = Instruction.parseOperand(text)[1]
+                except ValueError as e:
+                    raise ValueError(f"Error encoding inner indirect operand '{text}' for operand '{operand}': {e}")
+                parsed = (AddressingMode.indirect(None), inner_addr)
+
+            elif kind == "direct":
+                # Labels/variables like START, END, M1: their value in 'variable' is the memory address.
+                if text not in variable:
+                    raise ValueError(f"Unknown addressing mode for operand: {operand}")
+                if not (0 <= variable[text] < 2**Length.opAddr):
+                    raise ValueError(f"Address {variable[text]} of '{text}' does not fit the {Length.opAddr}-bit address field")
+                parsed = (AddressingMode.direct(None), format(variable[text], addr_format))
+
+            else:
+                # R#, I#, *R# and A#: the address field holds the numeric address of the register itself.
+                if text not in variable or variable.namespace(text) != "register":
+                    raise ValueError(f"Register '{text}' not defined in variable table for operand: {operand}")
+                parsed = (register_modes[kind], format(variable[text], addr_format))
+
+        operand_cache[operand] = parsed
+        return parsed
 
     @staticmethod
-    def encode(instruction_line):
+    def encode(instruction_line, line_number=None):
         """
-        Encodes a single instruction line into a 32-bit binary instruction code.
+        Encodes a single instruction line into a Length.instrxn-bit binary instruction code (32 bits by default).
+        Errors name the column of the offending token, and the line when line_number is given.
         """
-        # Replace commas with spaces to ensure operands are cleanly separated
-        cleaned_line = instruction_line.replace(',', ' ')
-        parts = cleaned_line.split() # Split by whitespace
+        # Opcode and operands are the runs between whitespace and commas
+        tokens = list(tokenPattern().finditer(instruction_line))
+        if not tokens:
+            raise ValueError(Instruction.location(line_number, 1) + "Empty instruction")
 
-        opcode_str = parts[0].upper()
-        operand1 = parts[1] if len(parts) > 1 else None
-        operand2 = parts[2] if len(parts) > 2 else None
+        opcode_str = tokens[0].group().upper()
 
         # 1. Encode Opcode (7 bits) = E/W bits (2 bits) + Category Code (5 bits)
-        opcode_group_index = -1
-        for i, group in enumerate(operations):
-            if opcode_str in group:
-                opcode_group_index = i
-                break
-        if opcode_group_index == -1:
-            raise ValueError(f"Unknown opcode: {opcode_str}")
-
-        ew_bits = operationCodes_EW[opcode_group_index]
-        # Category code is the index of the opcode within its group, formatted to 5 bits
-        category_code = format(operations[opcode_group_index].index(opcode_str), '05b')
-        opcode_binary = ew_bits + category_code # This is 7 bits (2+5)
-
-        # 2. Encode Addressing Modes (3 bits each)
-        op1_mode = Instruction.getAddressingMode(operand1)
-        op2_mode = Instruction.getAddressingMode(operand2)
-
-        # 3. Encode Operand Addresses/Values (8 bits each)
-        op1_addr = Instruction.encodeOp(operand1)
-        op2_addr = Instruction.encodeOp(operand2)
-
-        # Concatenate all parts to form the 32-bit instruction
+        opcode_binary = opcode_bits.get(opcode_str)
+        if opcode_binary is None:
+            raise ValueError(Instruction.location(line_number, tokens[0].start() + 1) + f"Unknown opcode: {opcode_str}")
+
+        # 2. and 3. Addressing Modes (3 bits each) and Operand Addresses/Values (Length.opAddr bits each)
+        fields = []
+        for index in (1, 2):
+            token = tokens[index] if len(tokens) > index else None
+            try:
+                fields.append(Instruction.parseOperand(token.group() if token else None))
+            except ValueError as e:
+                raise ValueError(Instruction.location(line_number, token.start() + 1) + str(e))
+        (op1_mode, op1_addr), (op2_mode, op2_addr) = fields
+
+        # Concatenate all parts to form the instruction
         # Format: Opcode (7 bits) + Op1_Mode (3 bits) + Op1_Addr (8 bits) + Op2_Mode (3 bits) + Op2_Addr (8 bits) + Extra (3 bits)
-        # Total = 7 + 3 + 8 + 3 + 8 + 3 = 32 bits
-        extra_bits = "000" # Placeholder for now, or derive from instruction if needed
+        # Total = 7 + 3 + 8 + 3 + 8 + 3 = 32 bits with the default 8-bit address fields
+        extra_bits = "0" * Length.extra # Placeholder for now, or derive from instruction if needed
 
         instruction_code = opcode_binary + op1_mode + op1_addr + op2_mode + op2_addr + extra_bits
         
-        # Ensure the final instruction code is exactly 32 bits long
+        # Ensure the final instruction code is exactly Length.instrxn bits long
         if len(instruction_code) != Length.instrxn:
             raise ValueError(f"Generated instruction code has incorrect length ({len(instruction_code)} bits) for instruction: {instruction_line}. Expected {Length.instrxn} bits.")
 
         return instruction_code
 
     @staticmethod
-    def preEncode(program_lines):
+    def location(line_number, column):
+        """Prefix for encoding errors, e.g. "Line 4, column 9: "."""
+        if line_number is None:
+            return f"Column {column}: "
+        return f"Line {line_number}, column {column}: "
+
+    @staticmethod
+    def decode(instruction_int):
+        """
+        Splits an instruction word back into its mnemonic and operand fields, following the Length layout.
+        Returns (opcode_str, op1_addr_binary, op1_mode_binary, op2_addr_binary, op2_mode_binary),
+        with opcode_str set to "UNKNOWN" if the opcode bits do not name an operation.
+        """
+        # Length.instrxn-bit binary string, split at the offsets Length.setFields computed for the layout
+        instruction_binary = format(instruction_int, Length.wordFormat)
+        op1_mode_binary = instruction_binary[Length.op1Mode:Length.op1Addr] # 3 bits
+        op1_addr_binary = instruction_binary[Length.op1Addr:Length.op2Mode] # Length.opAddr bits
+        op2_mode_binary = instruction_binary[Length.op2Mode:Length.op2Addr] # 3 bits
+        op2_addr_binary = instruction_binary[Length.op2Addr:Length.op2End] # Length.opAddr bits
+        # Remaining Length.extra bits are extra/unused.
+
+        # Map the opcode bits (EW (2) + Category (5)) back to the mnemonic (e.g., "MOV", "ADD")
+        opcode_str = opcode_names.get(instruction_binary[0:Length.opCode], "UNKNOWN")
+
+        return (opcode_str, op1_addr_binary, op1_mode_binary, op2_addr_binary, op2_mode_binary)
+
+    @staticmethod
+    def disassemble(instruction_int):
+        """
+        Converts an instruction word back into assembly text (e.g., "MOV #5, R1").
+        Addresses are shown by name when the 'variable' table has one for them (see SymbolTable.symbol).
+        """
+        opcode_str, op1_addr, op1_mode, op2_addr, op2_mode = Instruction.decode(instruction_int)
+        if opcode_str == "UNKNOWN":
+            return f"UNKNOWN {format(instruction_int, f'0{Length.instrxn}b')}"
+
+        operands = []
+        for addr_binary, mode_binary in ((op1_addr, op1_mode), (op2_addr, op2_mode)):
+            addr = int(addr_binary, 2)
+            if mode_binary == AddressingMode.register(None) and addr == 0:
+                continue # Operand slot left empty by encodeOp
+            operands.append(Instruction.disassembleOp(addr, mode_binary))
+        return opcode_str + (" " + ", ".join(operands) if operands else "")
+
+    @staticmethod
+    def disassembleOp(addr, mode_binary):
+        """Returns the assembly spelling of one decoded operand."""
+        if mode_binary == AddressingMode.immediate(None):
+            return f"#{addr}"
+        if mode_binary == AddressingMode.register_indirect(None):
+            return "*" + variable.symbolize(addr, "register")
+        if mode_binary == AddressingMode.indirect(None):
+            return f"[{variable.symbolize(addr, 'memory')}]" # Program labels win over M# names
+        if mode_binary in (AddressingMode.register(None), AddressingMode.indexed(None)):
+            return variable.symbolize(addr, "register")
+        return variable.symbolize(addr, "memory")
+
+    @staticmethod
+    def preEncode(program_lines, verbose=True, origins=None):
         """
         First pass: identifies and stores addresses for labels (DEF) and blocks (DEB).
+        Labels may not reuse a register or memory name (see SymbolTable.define); each one
+        is printed as it is defined unless verbose is False. origins gives the source line
+        number of each line for error messages (see inlineCalls).
         Returns the original program lines for the second pass.
         """
+        if origins is None:
+            origins = range(1, len(program_lines) + 1)
         temp_pc = 0
-        for line in program_lines:
+        for line_number, line in zip(origins, program_lines):
             line = line.strip()
             if not line or line.startswith("#"):
                 continue # Skip empty lines and comments
@@ -168,41 +249,143 @@ class Instruction:
             parts = line.split(maxsplit=2) # Use split without comma replacement for DEF/DEB parsing
             opcode_str = parts[0].upper()
 
-            if opcode_str == "DEF":
-                function_name = parts[1]
-                variable[function_name] = temp_pc
-                print(f"Defined function {function_name} at address {temp_pc}")
-                continue # DEF instructions don't occupy a memory slot themselves
-
-            elif opcode_str == "DEB":
-                block_name = parts[1]
-                variable[block_name] = temp_pc
-                print(f"Defined block {block_name} at address {temp_pc}")
-                continue # DEB instructions don't occupy a memory slot themselves
+            if opcode_str in ("DEF", "DEB"):
+                # DEF names a function and DEB a block; neither occupies a memory slot itself
+                name = parts[1]
+                try:
+                    variable.define(name, temp_pc)
+                except ValueError as e:
+                    raise ValueError(Instruction.location(line_number, line.index(name, len(parts[0])) + 1) + str(e))
+                if verbose:
+                    print(f"Defined {'function' if opcode_str == 'DEF' else 'block'} {name} at address {temp_pc}")
+                continue
 
             # Only increment PC for actual executable instructions
             temp_pc += 1
         return program_lines # Return original lines for second pass
 
     @staticmethod
-    def encodeProgram(program):
+    def inlineCalls(program_lines, limit, verbose=True):
+        """
+        Optional pass before preEncode: replaces "CALL NAME" with the body of NAME when NAME is a
+        small leaf subroutine - at most 'limit' instructions before its single, final RET, with no
+        CALL, jump or EOP inside and balanced PUSH/POP. A subroutine whose calls were all inlined,
+        and that cannot be reached by falling through, is dropped; labels are assigned afterwards
+        by preEncode, so the remaining ones are relocated automatically. Each inlined subroutine
+        is reported unless verbose is False.
+        Returns (lines, origins): origins[i] is the source line number lines[i] came from.
+        """
+        def opcodeOf(line):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                return None
+            return line.split()[0].upper()
+
+        def operandsOf(line):
+            return line.replace(',', ' ').split()[1:]
+
+        lines = [line.strip() for line in program_lines]
+
+        # Locate each DEF block: the DEF line and its lines up to the next DEF/DEB.
+        blocks = {}
+        for i, line in enumerate(lines):
+            if opcodeOf(line) == "DEF":
+                end = i + 1
+                while end < len(lines) and opcodeOf(lines[end]) not in ("DEF", "DEB"):
+                    end += 1
+                blocks[operandsOf(line)[0]] = (i, end)
+
+        # References to each label other than as a CALL target prevent removing its block.
+        call_sites = {}
+        other_uses = set()
+        for i, line in enumerate(lines):
+            opcode_str = opcodeOf(line)
+            if opcode_str is None or opcode_str in ("DEF", "DEB"):
+                continue
+            for operand in operandsOf(line):
+                name = operand.strip("[]*")
+                if name in blocks:
+                    if opcode_str == "CALL":
+                        call_sites.setdefault(name, []).append(i)
+                    else:
+                        other_uses.add(name)
+
+        inlinable = {}
+        for name, (start, end) in blocks.items():
+            body = [i for i in range(start + 1, end) if opcodeOf(lines[i]) is not None]
+            opcodes = [opcodeOf(lines[i]) for i in body]
+            if not body or opcodes[-1] != "RET" or len(body) - 1 > limit:
+                continue
+            if any(op in ("RET", "CALL", "EOP") or op.startswith("J") for op in opcodes[:-1]):
+                continue
+            depth = 0
+            for op in opcodes:
+                depth += (op == "PUSH") - (op == "POP")
+                if depth < 0:
+                    break
+            if depth != 0 or name not in call_sites:
+                continue
+            inlinable[name] = body[:-1]
+
+        # A block can be dropped when nothing but CALLs used it and the instruction before it
+        # never falls through into it.
+        removable = set()
+        for name in inlinable:
+            start = blocks[name][0]
+            previous = [opcodeOf(lines[i]) for i in range(start) if opcodeOf(lines[i]) not in (None, "DEF", "DEB")]
+            if name not in other_uses and previous and previous[-1] in ("JMP", "RET", "EOP"):
+                removable.add(name)
+
+        out_lines, origins = [], []
+        skip_until = -1
+        for i, line in enumerate(lines):
+            if i < skip_until:
+                continue
+            opcode_str = opcodeOf(line)
+            if opcode_str == "DEF" and operandsOf(line)[0] in removable:
+                skip_until = blocks[operandsOf(line)[0]][1]
+                continue
+            if opcode_str == "CALL" and operandsOf(line)[0] in inlinable:
+                for j in inlinable[operandsOf(line)[0]]:
+                    out_lines.append(lines[j])
+                    origins.append(j + 1)
+                continue
+            out_lines.append(line)
+            origins.append(i + 1)
+
+        for name in inlinable if verbose else ():
+            print(f"Inlined {name} at {len(call_sites[name])} call site(s)")
+        return out_lines, origins
+
+    @staticmethod
+    def encodeProgram(program, inline_limit=0, source_name=None, verbose=True):
         """
         Main compilation function: performs two passes to encode the program.
         First pass for labels, second pass for instruction encoding.
+        inline_limit: if above 0, leaf subroutines of up to that many instructions are inlined
+                      at their CALL sites first (see inlineCalls).
+        source_name: file name recorded with each line in the source map (variable.source).
+        verbose: False keeps preEncode and inlineCalls from printing the labels and inlined subroutines.
         """
         # Get initial PC from register storage (numeric address)
         initial_pc = register.load(variable['PC'])
-        
+
+        origins = range(1, len(program) + 1)
+        if inline_limit > 0:
+            program, origins = Instruction.inlineCalls(program, inline_limit, verbose)
+
         # Perform the first pass to identify labels/blocks
         # This function modifies the global 'variable' dictionary
-        processed_program_lines = Instruction.preEncode(program)
+        processed_program_lines = Instruction.preEncode(program, verbose, origins)
 
         encoded_instructions = []
         # --- Second pass: encode instructions ---
         # Use a temporary PC for instruction storage during encoding
         temp_pc_for_encoding = initial_pc
+        variable.source.clear()
+        operand_cache.clear()
 
-        for line in processed_program_lines:
+        for line_number, line in zip(origins, processed_program_lines):
             line = line.strip()
             if not line or line.startswith("#"):
                 continue
@@ -215,10 +398,11 @@ class Instruction:
 
             instruction_to_encode = line # Use the original line for encoding after label pass
 
-            binary_instruction_code = Instruction.encode(instruction_to_encode)
+            binary_instruction_code = Instruction.encode(instruction_to_encode, line_number)
             if binary_instruction_code:
                 instruction_int_value = int(binary_instruction_code, 2)
                 memory.store(temp_pc_for_encoding, instruction_int_value)
                 encoded_instructions.append((temp_pc_for_encoding, binary_instruction_code, instruction_int_value))
+                variable.source[temp_pc_for_encoding] = (source_name, line_number)
                 temp_pc_for_encoding += 1
         return encoded_instructions
\ No newline at end of file
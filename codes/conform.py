@@ -0,0 +1,289 @@
+# conform.py
+"""
+Differential conformance testing of execution engines against the reference Program.run.
+Random valid programs and SCAN inputs run on both engines; PRNT output, exceptions, exit code,
+final registers and memory must match. A mismatch is shrunk to a minimal program and input list.
+
+Usage: python conform.py [--engine NAME] [--count N] [--size N] [--seed S]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import sys
+
+from storage import register, memory, variable
+from snapshot import Snapshot
+from run import Program
+
+data_base = 200 # Data area for *R6 (VPR area, past the code and the stack)
+data_words = 8
+sources = ["R1", "R2", "R3", "R4", "R5"]
+
+class Unsupported(Exception):
+    """Raised by a candidate engine for a program outside its contract (e.g., rejected by verify())."""
+
+# --- Program generator ---
+
+def randomProgram(rng, size=30, routines=2):
+    """
+    Returns (lines, inputs): a terminating program of about 'size' main instructions and a list
+    of SCAN inputs. Jumps only go forward and subroutines F1..Fn only call higher-numbered ones.
+    Stores into the code, directly (M1..M7 are code addresses 1..7) or through the code pointer
+    R7, write small immediates, which decode as PRNT words, so patched programs still terminate.
+    Zero divisors and unbalanced POPs are generated now and then to exercise the exceptions.
+    Before EOP every routine is called twice from the same register contents, so engines that
+    cache calls (memoized) replay a result instead of only recording one.
+    """
+    reads = [0]
+
+    def source():
+        kind = rng.random()
+        if kind < 0.45:
+            return rng.choice(sources)
+        if kind < 0.8:
+            return f"#{rng.randint(0, 9)}"
+        if kind < 0.9:
+            reads[0] += 1
+            return "*R6"
+        return rng.choice(["A1", "M3", "[R1]"])
+
+    def destination():
+        kind = rng.random()
+        if kind < 0.8:
+            return rng.choice(sources)
+        return rng.choice(["*R6", "A1"])
+
+    def block(count, level):
+        lines = []
+        depth = 0
+        jumps = []
+        for i in range(count):
+            op = rng.choices(["MOV", "ADD", "SUB", "MUL", "DIV", "PUSH", "POP", "PRNT", "SCAN", "CALL", "JMP", "JEQ", "PATCH"],
+                             [5, 4, 3, 2, 2, 2, 2, 2, 1, 1, 1, 0.3, 0.5])[0]
+            if op == "PATCH": # Self-modifying store
+                if rng.random() < 0.5:
+                    lines.append(f"MOV #{rng.randint(0, 9)}, M{rng.randint(1, 7)}")
+                else:
+                    lines += [f"MOV #{rng.randint(0, 2 * size)}, R7", f"MOV #{rng.randint(0, 9)}, *R7"]
+            elif op == "PUSH":
+                lines.append(f"PUSH {source()}")
+                depth += 1
+            elif op == "POP":
+                if depth > 0 or rng.random() < 0.05:
+                    lines.append(f"POP {destination()}")
+                    depth -= 1
+            elif op == "CALL":
+                if level < routines:
+                    lines.append(f"CALL F{rng.randint(level + 1, routines)}")
+            elif op == "JMP":
+                label = f"L{level}_{i}"
+                lines.append(f"JMP {label}")
+                jumps.append(label)
+            elif op == "JEQ": # Not implemented by the interpreter; must stay a no-op everywhere
+                lines.append(f"JEQ {source()}, {source()}")
+            elif op in ("PRNT", "SCAN"):
+                lines.append(f"{op} {source() if op == 'PRNT' else destination()}")
+            elif op == "MOV":
+                lines.append(f"MOV {source()}, {destination()}")
+            else:
+                lines.append(f"{op} {destination()}, {source()}")
+            if reads[0] >= data_words:
+                lines.append(f"MOV #{data_base}, R6")
+                reads[0] = 0
+            # Place labels of pending jumps at random later points
+            for label in list(jumps):
+                if rng.random() < 0.3:
+                    lines.append(f"DEF {label}")
+                    jumps.remove(label)
+        lines += [f"DEF {label}" for label in jumps]
+        lines += ["POP R5"] * max(depth, 0)
+        return lines
+
+    repeats = []
+    for level in range(1, routines + 1):
+        setup = [f"MOV #{rng.randint(0, 9)}, {name}" for name in sources] + [f"MOV #{data_base}, R6"]
+        repeats += (setup + [f"CALL F{level}"]) * 2
+    lines = ["DEF START", f"MOV #{data_base}, R6"] + block(size, 0) + repeats + ["EOP"]
+    for level in range(1, routines + 1):
+        lines += [f"DEF F{level}"] + block(rng.randint(1, 6), level) + ["RET"]
+    inputs = [rng.randint(-3, 9) for _ in range(sum(1 for line in lines if line.startswith("SCAN")) * 2)]
+    return lines, inputs
+
+# --- Engines: each compiles and runs lines the way it would in production ---
+
+def reference(lines):
+    Program(lines).run()
+
+def verified(lines):
+    program = Program(lines)
+    try:
+        program.verify()
+    except ValueError:
+        raise Unsupported("rejected by verify()")
+    program.run()
+
+def monitored(lines):
+    from cover import Coverage
+    Program(lines).run(coverage=Coverage())
+
+def memoized(lines):
+    program = Program(lines)
+    program.memoize()
+    program.run()
+
+def incremental(lines):
+    from incremental import IncrementalCompiler
+    compiler = IncrementalCompiler()
+    Program.resetRegisters()
+    compiler.compile(lines)
+    compiler.program().run()
+
+def linked(lines):
+    from linker import Module, load
+    load([Module.compile(lines)]).run()
+
+def lockstep(lines, inputs):
+    from lockstep import Lockstep, np
+    if np is None:
+        raise Unsupported("NumPy is not installed")
+    program = Program(lines)
+    # int64 lanes wrap on overflow (a documented difference); object lanes hold exact Python ints
+    batch = Lockstep(program, [inputs or [0]], dtype=object)
+    try:
+        codes = batch.run()
+    finally:
+        for pc, lanes, values in batch.printed:
+            print(f"EXCEPTION: {values}" if isinstance(values, str) else f"PRNT: {values[0]}")
+        for address in range(batch.registers.shape[0]):
+            register.store(address, int(batch.registers[address, 0]))
+        for address in range(batch.memory.shape[0]):
+            memory.store(address, int(batch.memory[address, 0]))
+        if any(memory.data[pc] != instruction_int for pc, _, instruction_int in program.encoded):
+            raise Unsupported("stores into the code") # Lockstep keeps running the loaded image
+    if codes[0] != -1:
+        sys.exit(int(codes[0]))
+
+engines = {"reference": reference, "verified": verified, "monitored": monitored, "memoized": memoized,
+           "incremental": incremental, "linked": linked, "lockstep": lockstep}
+needs_inputs = {lockstep} # Engines that take the SCAN inputs as an argument instead of stdin
+
+# --- Running and comparing ---
+
+pristine = None
+
+def execute(engine, lines, inputs):
+    """Runs one engine from the pristine VM state; returns its outcome, or None if Unsupported."""
+    global pristine
+    if pristine is None:
+        pristine = Snapshot()
+    outcome = {"output": [], "exit": None, "error": None}
+    output = io.StringIO()
+    stdin = sys.stdin
+    sys.stdin = io.StringIO("".join(f"{value}\n" for value in inputs))
+    try:
+        with contextlib.redirect_stdout(output):
+            if engine in needs_inputs:
+                engine(lines, inputs)
+            else:
+                engine(lines)
+    except Unsupported:
+        return None
+    except SystemExit as e: # EOP and Program.exception
+        outcome["exit"] = e.code
+    except EOFError:
+        outcome["error"] = "SCAN input exhausted"
+    except Exception as e:
+        outcome["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        sys.stdin = stdin
+        printed = output.getvalue().replace("SCAN: Enter a value: ", "") # The prompt has no newline
+        outcome["output"] = [line for line in printed.splitlines() if line.startswith(("PRNT:", "EXCEPTION:"))]
+        outcome["registers"] = {k: v for k, v in register.data.items() if v != 0}
+        outcome["memory"] = {k: v for k, v in memory.data.items() if v != 0}
+        pristine.restore()
+    return outcome
+
+def differences(expected, actual):
+    """Names of the outcome fields that differ. Errors are compared by exception type only: messages are engine-specific."""
+    def kind(outcome, field):
+        value = outcome[field]
+        return value.split(":")[0] if field == "error" and value else value
+    return [field for field in ("output", "exit", "error", "registers", "memory") if kind(expected, field) != kind(actual, field)]
+
+def mismatch(candidate, lines, inputs):
+    """Returns (fields, reference outcome, candidate outcome) if the engines disagree, else None."""
+    actual = execute(candidate, lines, inputs)
+    if actual is None:
+        return None
+    expected = execute(reference, lines, inputs)
+    fields = differences(expected, actual)
+    return (fields, expected, actual) if fields else None
+
+def shrink(candidate, lines, inputs):
+    """
+    Removes chunks of lines, then inputs, as long as the engines still disagree on the same
+    fields (ddmin), so the reproducer keeps the original failure instead of drifting to another.
+    """
+    fields = mismatch(candidate, lines, inputs)[0]
+    for name in ("lines", "inputs"):
+        items = lines if name == "lines" else inputs
+        chunk = max(len(items) // 2, 1)
+        while chunk >= 1:
+            start = 0
+            while start < len(items):
+                trial = items[:start] + items[start + chunk:]
+                trial_lines, trial_inputs = (trial, inputs) if name == "lines" else (lines, trial)
+                found = mismatch(candidate, trial_lines, trial_inputs)
+                if found and found[0] == fields:
+                    items = trial
+                    lines, inputs = trial_lines, trial_inputs
+                else:
+                    start += chunk
+            chunk //= 2
+    return lines, inputs
+
+def check(candidate, count=100, size=30, seed=0):
+    """
+    Compares a candidate engine with the reference on 'count' random programs.
+    Returns (programs compared, None) or (programs compared, (lines, inputs, fields, expected, actual))
+    for the first mismatch, already shrunk.
+    """
+    compared = 0
+    for case in range(count):
+        lines, inputs = randomProgram(random.Random(seed + case), size)
+        actual = execute(candidate, lines, inputs)
+        if actual is None:
+            continue
+        compared += 1
+        if not differences(execute(reference, lines, inputs), actual):
+            continue
+        lines, inputs = shrink(candidate, lines, inputs)
+        fields, expected, actual = mismatch(candidate, lines, inputs)
+        return compared, (lines, inputs, fields, expected, actual)
+    return compared, None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--engine", choices=sorted(set(engines) - {"reference"}), default="verified")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--size", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    compared, found = check(engines[args.engine], args.count, args.size, args.seed)
+    if found is None:
+        print(f"{args.engine}: {compared} of {args.count} programs match the reference")
+        return
+    lines, inputs, fields, expected, actual = found
+    print(f"{args.engine}: mismatch in {', '.join(fields)}. Minimal program:")
+    print("\n".join(lines))
+    print(f"Inputs: {inputs}")
+    for field in fields:
+        print(f"reference {field}: {expected[field]}")
+        print(f"{args.engine} {field}: {actual[field]}")
+    sys.exit(1)
+
+if __name__ == "__main__":
+    main()
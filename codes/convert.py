@@ -6,12 +6,30 @@ class Length:
 	fraction = precision-whole-1
 	dec_place = 2
 	instrxn = 32
+	opCode = 7
 	opAddr = 8
 	opMode = 3
 	operand = opAddr+opMode
+	extra = instrxn-opCode-2*operand
 	@staticmethod
 	def trimDec(value,places=dec_place):
 		return round(float(value),places)
+	def setOpAddr(bits):
+		# Words are 2*bits+16 bits wide and must fit the 64-bit words of tracer and storage dumps
+		if not 1<=bits<=24:
+			raise ValueError(f"Operand address width must be between 1 and 24 bits, got {bits}")
+		Length.opAddr = bits
+		Length.operand = bits+Length.opMode
+		Length.instrxn = Length.opCode+2*Length.operand+Length.extra
+		Length.setFields()
+	def setFields():
+		# Field offsets of an instruction word for Instruction.decode, recomputed only when the layout changes
+		Length.op1Mode = Length.opCode
+		Length.op1Addr = Length.op1Mode+Length.opMode
+		Length.op2Mode = Length.op1Addr+Length.opAddr
+		Length.op2Addr = Length.op2Mode+Length.opMode
+		Length.op2End = Length.op2Addr+Length.opAddr
+		Length.wordFormat = f"0{Length.instrxn}b"
 	def addZeros(value,strlen,lead=True):
 		toBin = type(value)!=type(str())
 		if toBin:
@@ -20,6 +38,8 @@ class Length:
 			return value.zfill(strlen)
 		return value+"".zfill(strlen-len(value))
 
+Length.setFields()
+
 class Value:
 	@staticmethod
 	def isNumber(value):
@@ -0,0 +1,137 @@
+# cover.py
+
+import struct
+import sys
+
+from storage import register, memory, variable
+
+branch_operations = ["JEQ", "JNE", "JLT", "JLE", "JGT", "JGE"]
+
+HEADER = struct.Struct("<4sHI") # magic, version, bitmap size in bits
+MAGIC = b"ISAC"
+VERSION = 1
+
+class Coverage:
+    """
+    Instruction coverage as bitmaps with one bit per word address: addresses executed, and for
+    conditional jumps whether the branch was taken and whether it fell through.
+    Pass an instance to Program.run(coverage=...); merge() combines the bitmaps of many runs.
+    """
+    def __init__(self, size=None):
+        self.size = size if size is not None else max(memory.max_size, 1)
+        length = (self.size + 7) // 8
+        self.executed = bytearray(length)
+        self.taken = bytearray(length)
+        self.fallthrough = bytearray(length)
+        self._branch = None
+        self._pc_address = variable['PC']
+
+    # --- Monitor protocol (see Program.runMonitored) ---
+
+    def start(self):
+        self._branch = None
+
+    def enter(self, pc, instruction_int, opcode_str):
+        self.executed[pc >> 3] |= 1 << (pc & 7)
+        if opcode_str in branch_operations:
+            self._branch = pc
+
+    def leave(self):
+        pc = self._branch
+        if pc is not None:
+            self._branch = None
+            bitmap = self.fallthrough if register.data[self._pc_address] == pc + 1 else self.taken
+            bitmap[pc >> 3] |= 1 << (pc & 7)
+
+    def stop(self):
+        self._branch = None
+
+    # --- Bitmaps ---
+
+    @staticmethod
+    def isSet(bitmap, pc):
+        return 0 <= pc < len(bitmap) * 8 and bool(bitmap[pc >> 3] & (1 << (pc & 7)))
+
+    def merge(self, other):
+        """ORs another Coverage (e.g., from another input set) into this one."""
+        if other.size != self.size:
+            raise ValueError(f"Cannot merge coverage of {other.size} words into {self.size} words")
+        for name in ("executed", "taken", "fallthrough"):
+            mine, theirs = getattr(self, name), getattr(other, name)
+            merged = int.from_bytes(mine, 'little') | int.from_bytes(theirs, 'little')
+            mine[:] = merged.to_bytes(len(mine), 'little')
+        return self
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.size) + self.executed + self.taken + self.fallthrough)
+
+    @staticmethod
+    def load(path):
+        with open(path, 'rb') as f:
+            raw = f.read()
+        magic, version, size = HEADER.unpack_from(raw)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a coverage file: {path}")
+        coverage = Coverage(size)
+        length = len(coverage.executed)
+        offset = HEADER.size
+        coverage.executed[:] = raw[offset:offset + length]
+        coverage.taken[:] = raw[offset + length:offset + 2 * length]
+        coverage.fallthrough[:] = raw[offset + 2 * length:offset + 3 * length]
+        return coverage
+
+    # --- Source-level report ---
+
+    @staticmethod
+    def lineMap(source_name=None):
+        """
+        pc -> source line number of the loaded code, from the source map in 'variable'.
+        source_name keeps only the lines of one file or linked module.
+        """
+        return {pc: line for pc, (name, line) in variable.source.items() if source_name is None or name == source_name}
+
+    def lines(self, line_map=None):
+        """
+        Maps source line numbers to (executed, taken, fallthrough) using a pc -> line map
+        (lineMap() of the loaded program by default).
+        """
+        line_map = Coverage.lineMap() if line_map is None else line_map
+        return {line: (self.isSet(self.executed, pc), self.isSet(self.taken, pc), self.isSet(self.fallthrough, pc))
+                for pc, line in line_map.items()}
+
+    def report(self, source_lines, line_map=None):
+        """Returns the annotated source as text, followed by a line/branch summary."""
+        line_map = Coverage.lineMap() if line_map is None else line_map
+        per_line = self.lines(line_map)
+        branch_lines = {line for pc, line in line_map.items()
+                        if source_lines[line - 1].split()[0].upper() in branch_operations}
+        out = []
+        for number, text in enumerate(source_lines, start=1):
+            if number not in per_line:
+                out.append(f"{number:5}      {text}")
+                continue
+            executed, taken, fallthrough = per_line[number]
+            mark = "+" if executed else "-"
+            note = ""
+            if number in branch_lines:
+                note = f"  [taken: {'yes' if taken else 'no'}, fallthrough: {'yes' if fallthrough else 'no'}]"
+            out.append(f"{number:5} {mark}    {text}{note}")
+        hit = sum(1 for executed, _, _ in per_line.values() if executed)
+        directions = sum(per_line[line][1] + per_line[line][2] for line in branch_lines)
+        out.append(f"Lines: {hit}/{len(per_line)} executed")
+        if branch_lines:
+            out.append(f"Branches: {directions}/{2 * len(branch_lines)} directions taken")
+        return "\n".join(out)
+
+if __name__ == "__main__":
+    # Usage: python cover.py program.isa run1.cov [run2.cov ...]
+    # Recompiles the source to recover its line map, merges the bitmaps and prints the report.
+    from run import Program
+    with open(sys.argv[1]) as f:
+        source = [line.strip() for line in f.readlines()]
+    Program(source)
+    total = Coverage.load(sys.argv[2])
+    for path in sys.argv[3:]:
+        total.merge(Coverage.load(path))
+    print(total.report(source))
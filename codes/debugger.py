@@ -0,0 +1,234 @@
+# debugger.py
+
+import cmd
+import sys
+
+from storage import register, memory, variable, register_list
+from compiler import Instruction
+
+class Debugger:
+    """
+    PC breakpoints, register/memory watchpoints and single-stepping for a loaded Program.
+    With no breakpoint or watchpoint set, cont() is just Program.run(). The stepping loop and the
+    watching store() wrappers are only installed while a breakpoint or watchpoint is active.
+    """
+    def __init__(self, program):
+        self.program = program
+        self.breakpoints = set()
+        self.watchpoints = {'register': set(), 'memory': set()}
+        self.hits = [] # (type, address, old value, new value) for watchpoints hit by the last instruction
+        self.exit_code = None # Set once EOP or an exception ended the program
+
+    @staticmethod
+    def resolve(addr):
+        """Accepts a numeric address or a name from 'variable' (register, memory name or label)."""
+        if isinstance(addr, str) and not addr.lstrip('-').isdigit():
+            if addr not in variable:
+                raise ValueError(f"Unknown name: {addr}")
+            return variable[addr]
+        return int(addr)
+
+    @staticmethod
+    def storageType(addr, typ=None):
+        # Register names (R#, A#, I#, PC, ...) watch registers unless a type is given.
+        if typ is not None:
+            return typ
+        return 'register' if isinstance(addr, str) and variable.namespace(addr) == "register" else 'memory'
+
+    def addBreakpoint(self, pc):
+        self.breakpoints.add(self.resolve(pc))
+
+    def removeBreakpoint(self, pc):
+        self.breakpoints.discard(self.resolve(pc))
+
+    def addWatchpoint(self, addr, typ=None):
+        self.watchpoints[self.storageType(addr, typ)].add(self.resolve(addr))
+
+    def removeWatchpoint(self, addr, typ=None):
+        self.watchpoints[self.storageType(addr, typ)].discard(self.resolve(addr))
+
+    def active(self):
+        return bool(self.breakpoints or self.watchpoints['register'] or self.watchpoints['memory'])
+
+    def pc(self):
+        return register.load(variable['PC'])
+
+    # --- Execution ---
+
+    def _watch(self):
+        """Hooks watching store() wrappers on the storages that have watchpoints; returns their hook handles."""
+        hooks = []
+        for typ, storage in (('register', register), ('memory', memory)):
+            watched = self.watchpoints[typ]
+            if not watched:
+                continue
+
+            def watchStores(store, storage=storage, watched=watched, typ=typ):
+                def watching_store(address, value):
+                    if address in watched:
+                        old = storage.data.get(address)
+                        store(address, value)
+                        self.hits.append((typ, address, old, storage.data.get(address)))
+                    else:
+                        store(address, value)
+                return watching_store
+
+            hooks.append((storage, storage.hook('store', watchStores)))
+        return hooks
+
+    @staticmethod
+    def _unwatch(hooks):
+        for storage, handle in hooks:
+            storage.unhook(handle)
+
+    def step(self):
+        """Executes one instruction. Returns the reason it stopped: "step", "watch", "exit" or "halt"."""
+        self.hits = []
+        saved = self._watch()
+        try:
+            if self.program.step() is None:
+                return "halt"
+        except SystemExit as e: # EOP and Program.exception end the program through sys.exit()
+            self.exit_code = e.code
+            return "exit"
+        finally:
+            self._unwatch(saved)
+        return "watch" if self.hits else "step"
+
+    def cont(self):
+        """
+        Runs until a breakpoint, a watchpoint hit or the end of the program.
+        Returns "break", "watch", "exit" or "halt".
+        """
+        if not self.active():
+            try:
+                self.program.run() # Unchanged fast path
+            except SystemExit as e:
+                self.exit_code = e.code
+                return "exit"
+            return "halt"
+
+        self.hits = []
+        saved = self._watch()
+        breakpoints = self.breakpoints
+        program = self.program
+        pc_address = variable['PC']
+        try:
+            first = True
+            while True:
+                if not first and register.load(pc_address) in breakpoints:
+                    return "break"
+                first = False
+                if program.step() is None:
+                    return "halt"
+                if self.hits:
+                    return "watch"
+        except SystemExit as e:
+            self.exit_code = e.code
+            return "exit"
+        finally:
+            self._unwatch(saved)
+
+    # --- Inspection ---
+
+    def inspect(self, addr, typ=None, isCode=False):
+        storage = register if self.storageType(addr, typ) == 'register' else memory
+        storage.dispStorageSlot(self.resolve(addr), isCode)
+
+    def dispRegisters(self):
+        for name in register_list + [f"R{i}" for i in range(1, 8)]:
+            print(f"{name}=", end="")
+            register.dispStorageSlot(variable[name])
+
+    def where(self):
+        pc = self.pc()
+        print(f"PC {pc}: {Instruction.disassemble(memory.load(pc, isCode=True))}")
+
+class DebuggerShell(cmd.Cmd):
+    """Command-line front end: python debugger.py program.isa"""
+    prompt = "(isadb) "
+
+    def __init__(self, debugger):
+        super().__init__()
+        self.debugger = debugger
+
+    def report(self, reason):
+        for typ, addr, old, new in self.debugger.hits:
+            print(f"Watchpoint {typ} {addr}: {old} -> {new}")
+        if reason == "exit":
+            print(f"Program ended with exit code {self.debugger.exit_code}")
+        elif reason != "halt":
+            self.debugger.where()
+
+    def default(self, line):
+        print(f"Unknown command: {line}")
+
+    def onecmd(self, line):
+        try:
+            return super().onecmd(line)
+        except ValueError as e:
+            print(e)
+
+    @staticmethod
+    def address(arg, command):
+        """Parses 'PC|LABEL'; raises ValueError with the usage line if it is missing."""
+        parts = arg.split()
+        if len(parts) != 1:
+            raise ValueError(f"Usage: {command} PC|LABEL")
+        return parts[0]
+
+    @staticmethod
+    def slot(arg, command):
+        """Parses 'ADDR|NAME [register|memory]' into (addr, type); raises ValueError with the usage line."""
+        parts = arg.split()
+        if not 1 <= len(parts) <= 2 or parts[1:] not in ([], ['register'], ['memory']):
+            raise ValueError(f"Usage: {command} ADDR|NAME [register|memory]")
+        return parts[0], parts[1] if len(parts) > 1 else None
+
+    def do_break(self, arg):
+        """break PC|LABEL - stop before executing that address"""
+        self.debugger.addBreakpoint(self.address(arg, "break"))
+
+    def do_delete(self, arg):
+        """delete PC|LABEL - remove a breakpoint"""
+        self.debugger.removeBreakpoint(self.address(arg, "delete"))
+
+    def do_watch(self, arg):
+        """watch ADDR|NAME [register|memory] - stop after an instruction stores to that slot"""
+        self.debugger.addWatchpoint(*self.slot(arg, "watch"))
+
+    def do_unwatch(self, arg):
+        """unwatch ADDR|NAME [register|memory] - remove a watchpoint"""
+        self.debugger.removeWatchpoint(*self.slot(arg, "unwatch"))
+
+    def do_step(self, arg):
+        """step - execute one instruction"""
+        self.report(self.debugger.step())
+
+    def do_cont(self, arg):
+        """cont - run until a breakpoint, watchpoint or the end of the program"""
+        self.report(self.debugger.cont())
+
+    def do_print(self, arg):
+        """print ADDR|NAME [register|memory] - show one storage slot"""
+        self.debugger.inspect(*self.slot(arg, "print"))
+
+    def do_regs(self, arg):
+        """regs - show the special and general purpose registers"""
+        self.debugger.dispRegisters()
+
+    def do_where(self, arg):
+        """where - show the next instruction"""
+        self.debugger.where()
+
+    def do_quit(self, arg):
+        """quit - leave the debugger"""
+        return True
+
+if __name__ == "__main__":
+    from run import Program
+    with open(sys.argv[1]) as f:
+        loaded = Program([line.strip() for line in f.readlines()])
+    shell = DebuggerShell(Debugger(loaded))
+    shell.debugger.where()
+    shell.cmdloop()
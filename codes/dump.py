@@ -0,0 +1,103 @@
+# dump.py
+"""
+Binary register/memory dumps and a fast diff between two dumps.
+
+Layout: a header (magic, version, bytes per word, register words, memory words) followed by the
+register file and then memory, each as little-endian unsigned words for addresses 0..n-1, where
+n is one past the highest address the storage holds (untouched pages of a wide address space are
+not written; diff reads words past the end of a region as 0). Ints are stored in two's
+complement, float slots as their spbin bit pattern.
+
+Usage: python dump.py diff before.bin after.bin
+"""
+
+import struct
+import sys
+from array import array
+
+from storage import register, memory
+from convert import Length, Precision
+
+HEADER = struct.Struct("<4sHHII") # magic, version, bytes per word, register words, memory words
+MAGIC = b"ISAD"
+VERSION = 1
+BLOCK = 64 # Words compared at once before looking at single words
+
+def typecodeFor(word_bytes):
+    for code in ('I', 'L', 'Q'):
+        if array(code).itemsize == word_bytes:
+            return code
+    raise ValueError(f"No array type for {word_bytes}-byte words")
+
+def words(storage, word_bytes):
+    """Packs a Storage's contents into a dense array of words (negative addresses are not dumped)."""
+    mask = (1 << (8 * word_bytes)) - 1
+    data = storage.data
+    size = max((k for k in data if k >= 0), default=-1) + 1 # Populated words, not the address space
+    packed = array(typecodeFor(word_bytes), bytes(size * word_bytes))
+    for address, value in data.items():
+        if address < 0:
+            continue
+        if isinstance(value, int):
+            packed[address] = value & mask
+        elif isinstance(value, str):
+            packed[address] = int(value, 2)
+        else:
+            packed[address] = int(Precision.dec2spbin(value), 2)
+    if sys.byteorder != 'little':
+        packed.byteswap()
+    return packed
+
+def dump(path, registers=register, memory_storage=memory):
+    """Writes the register file and memory to 'path' in a single write."""
+    word_bytes = 4 if Length.instrxn <= 32 else 8
+    reg_words = words(registers, word_bytes)
+    mem_words = words(memory_storage, word_bytes)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, word_bytes, len(reg_words), len(mem_words))
+                + reg_words.tobytes() + mem_words.tobytes())
+
+def read(path):
+    """Returns (word_bytes, register bytes, memory bytes) of a dump."""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    magic, version, word_bytes, reg_count, mem_count = HEADER.unpack_from(raw)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Not a storage dump: {path}")
+    view = memoryview(raw)
+    reg_end = HEADER.size + reg_count * word_bytes
+    return word_bytes, view[HEADER.size:reg_end], view[reg_end:reg_end + mem_count * word_bytes]
+
+def diffRegion(space, old, new, word_bytes):
+    """Compares two regions block by block and yields (space, address, old, new) for changed words."""
+    longest = max(len(old), len(new))
+    if len(old) < longest:
+        old = bytes(old) + bytes(longest - len(old))
+    if len(new) < longest:
+        new = bytes(new) + bytes(longest - len(new))
+    step = BLOCK * word_bytes
+    for offset in range(0, longest, step):
+        if old[offset:offset + step] == new[offset:offset + step]:
+            continue
+        for start in range(offset, min(offset + step, longest), word_bytes):
+            before = old[start:start + word_bytes]
+            after = new[start:start + word_bytes]
+            if before != after:
+                yield (space, start // word_bytes, int.from_bytes(before, 'little'), int.from_bytes(after, 'little'))
+
+def diff(old_path, new_path):
+    """Returns the list of (space, address, old word, new word) that differ between two dumps."""
+    old_bytes, old_regs, old_mem = read(old_path)
+    new_bytes, new_regs, new_mem = read(new_path)
+    if old_bytes != new_bytes:
+        raise ValueError(f"Dumps use different word sizes ({old_bytes} and {new_bytes} bytes)")
+    return list(diffRegion('register', old_regs, new_regs, old_bytes)) + list(diffRegion('memory', old_mem, new_mem, old_bytes))
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] != "diff":
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(2)
+    changes = diff(sys.argv[2], sys.argv[3])
+    for space, address, before, after in changes:
+        print(f"{space} {address}: {before} -> {after}")
+    sys.exit(1 if changes else 0)
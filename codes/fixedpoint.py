@@ -0,0 +1,124 @@
+# fixedpoint.py
+
+from storage import register, variable
+from convert import Length
+from addressing import Access, AddressingMode
+from run import Program, division_by_zero_exception
+
+class Fixed:
+    """
+    Signed fixed-point numbers stored as raw ints: Length.fraction fraction bits and
+    Length.whole whole bits plus a sign bit, i.e. Length.precision bits in total.
+    Results outside that range saturate; each helper returns (raw, overflowed).
+    """
+    @staticmethod
+    def limits():
+        return -2**(Length.precision-1), 2**(Length.precision-1)-1
+
+    @staticmethod
+    def saturate(raw):
+        low, high = Fixed.limits()
+        if raw < low:
+            return low, True
+        if raw > high:
+            return high, True
+        return raw, False
+
+    @staticmethod
+    def fromNumber(value):
+        return Fixed.saturate(round(value * 2**Length.fraction))
+
+    @staticmethod
+    def toNumber(raw):
+        if raw % 2**Length.fraction == 0:
+            return raw >> Length.fraction
+        return Length.trimDec(raw / 2**Length.fraction)
+
+    @staticmethod
+    def add(a, b):
+        return Fixed.saturate(a + b)
+
+    @staticmethod
+    def sub(a, b):
+        return Fixed.saturate(a - b)
+
+    @staticmethod
+    def mul(a, b):
+        return Fixed.saturate((a * b) >> Length.fraction)
+
+    @staticmethod
+    def div(a, b):
+        # Same floor quotient as Program's '//', scaled back to fixed point
+        return Fixed.saturate((a // b) << Length.fraction)
+
+class FixedPointProgram(Program):
+    """
+    Program whose arithmetic runs on the Fixed backend instead of floats stored through
+    Precision's spbin strings. Registers and memory hold raw ints; immediates are scaled on read,
+    and pointer contents are scaled back to addresses. Overflow saturates and sets FR to 1.
+    """
+    arithmetic = {"ADD": Fixed.add, "SUB": Fixed.sub, "MUL": Fixed.mul, "DIV": Fixed.div}
+    overflows = 0 # Saturated results so far; counted per instance, including ones built by fromImage
+
+    def flagOverflow(self, overflowed):
+        if overflowed:
+            self.overflows += 1
+            register.store(variable['FR'], 1)
+
+    def getOp(self, operand_binary_str, mode_binary_str):
+        effective, storage_type = super().getOp(operand_binary_str, mode_binary_str)
+        if mode_binary_str in (AddressingMode.register_indirect(None), AddressingMode.indirect(None), AddressingMode.indexed(None)):
+            return (effective >> Length.fraction, storage_type) # Pointer contents are fixed-point too
+        return (effective, storage_type)
+
+    def operandValue(self, operand_binary_str, mode_binary_str):
+        """Raw fixed-point value of a source operand (immediates scaled, auto-increment by one unit)."""
+        if mode_binary_str == AddressingMode.autoinc(None):
+            reg_address = int(operand_binary_str, 2)
+            current_val = Access.data(reg_address, flow=["reg"])
+            Access.store('register', reg_address, current_val + 2**Length.fraction)
+            value = Access.data(current_val >> Length.fraction, flow=["mem"])
+        else:
+            addr_or_val, op_type = self.getOp(operand_binary_str, mode_binary_str)
+            if op_type == 'value':
+                return addr_or_val << Length.fraction
+            value = Access.data(addr_or_val, flow=["reg" if op_type == 'register' else "mem"])
+        if isinstance(value, float): # Left over from float storage (e.g., a mapped segment)
+            value, overflowed = Fixed.fromNumber(value)
+            self.flagOverflow(overflowed)
+        return value
+
+    def execute(self, opcode_str, op1_addr_binary, op1_mode_binary, op2_addr_binary, op2_mode_binary):
+        if opcode_str in self.arithmetic:
+            val1 = self.operandValue(op1_addr_binary, op1_mode_binary)
+            val2 = self.operandValue(op2_addr_binary, op2_mode_binary)
+            if opcode_str == "DIV" and val2 == 0:
+                Program.exception(division_by_zero_exception)
+            result, overflowed = self.arithmetic[opcode_str](val1, val2)
+            self.flagOverflow(overflowed)
+            self.write(op1_addr_binary, op1_mode_binary, result)
+
+        elif opcode_str == "MOV":
+            self.write(op2_addr_binary, op2_mode_binary, self.operandValue(op1_addr_binary, op1_mode_binary))
+
+        elif opcode_str == "PRNT":
+            print(f"PRNT: {Fixed.toNumber(self.operandValue(op1_addr_binary, op1_mode_binary))}")
+
+        elif opcode_str == "PUSH":
+            val_to_push = self.operandValue(op1_addr_binary, op1_mode_binary)
+            new_tsp = Access.data('TSP', flow=["reg"]) + 1
+            Access.store('register', 'TSP', new_tsp)
+            Access.store('memory', new_tsp, val_to_push)
+
+        elif opcode_str == "SCAN":
+            user_input = input("SCAN: Enter a value: ")
+            try:
+                value_from_input, overflowed = Fixed.fromNumber(float(user_input))
+                self.flagOverflow(overflowed)
+            except ValueError:
+                print("Invalid input. Storing 0.")
+                value_from_input = 0
+            self.write(op1_addr_binary, op1_mode_binary, value_from_input)
+
+        else: # Control flow, POP, EOP... do not depend on the number format
+            super().execute(opcode_str, op1_addr_binary, op1_mode_binary, op2_addr_binary, op2_mode_binary)
@@ -0,0 +1,158 @@
+# incremental.py
+
+import difflib
+
+from storage import register, memory, variable
+from convert import Length
+import compiler
+from compiler import Instruction, tokenPattern
+from linker import Module, patch
+
+class IncrementalCompiler:
+    """
+    Recompiles an edited source by reusing the previous compile: the encoded word of every
+    unchanged line is kept, instructions that reference a label whose address moved get their
+    address field patched, and only new or edited lines go through Instruction.encode.
+    Produces the same encoded list, memory words, labels, and source map as
+    Instruction.encodeProgram (without CALL inlining). Words that neither changed nor moved are
+    not stored again, so memory at the code addresses must still hold the previous compile.
+    """
+    def __init__(self):
+        self.lines = [] # Stripped source of the last compile
+        self.records = [] # Per line: None, ("label", name) or ("code", [(operand field, label)])
+        self.words = [] # Per line: (binary, int) for instructions, else None
+        self.pcs = [] # Per line: the address its word was stored at, else None
+        self.labels = {}
+        self.base = None # PC of the first instruction, read from the PC register on the first compile
+        self.encoded = []
+        self.stats = {"encoded": 0, "patched": 0, "reused": 0}
+
+    @staticmethod
+    def parse(line):
+        if not line or line.startswith("#"):
+            return None
+        tokens = tokenPattern().findall(line)
+        if tokens[0].upper() in ("DEF", "DEB"):
+            return ("label", line.split()[1])
+        refs = []
+        for field, operand in enumerate(tokens[1:3], start=1):
+            label = Module.labelOf(operand)
+            if label is not None:
+                refs.append((field, label))
+        return ("code", refs)
+
+    def match(self, new_lines):
+        """Returns, for each new line, the index of the identical old line it continues, or None."""
+        old_lines = self.lines
+        origin = [None] * len(new_lines)
+        # Edits are usually in one place: skip the common head and tail before diffing the rest
+        head = 0
+        limit = min(len(old_lines), len(new_lines))
+        while head < limit and old_lines[head] == new_lines[head]:
+            origin[head] = head
+            head += 1
+        tail = 0
+        while tail < limit - head and old_lines[-1 - tail] == new_lines[-1 - tail]:
+            origin[len(new_lines) - 1 - tail] = len(old_lines) - 1 - tail
+            tail += 1
+        middle = difflib.SequenceMatcher(None, old_lines[head:len(old_lines) - tail],
+                                         new_lines[head:len(new_lines) - tail], autojunk=False)
+        for tag, i1, i2, j1, j2 in middle.get_opcodes():
+            if tag == "equal":
+                for k in range(i2 - i1):
+                    origin[head + j1 + k] = head + i1 + k
+        return origin
+
+    def compile(self, program_lines):
+        """Compiles the new version of the source; returns the encoded list as encodeProgram does."""
+        new_lines = [line.strip() for line in program_lines]
+        if self.base is None:
+            self.base = register.load(variable['PC'])
+        origin = self.match(new_lines)
+
+        # Layout: labels from the kept and the new records, counted from 0 as preEncode does
+        records = []
+        labels = {}
+        pc = 0
+        for j, line in enumerate(new_lines):
+            record = self.records[origin[j]] if origin[j] is not None else self.parse(line)
+            records.append(record)
+            if record is None:
+                continue
+            if record[0] == "label":
+                labels[record[1]] = pc
+            else:
+                pc += 1
+        moved = {name for name in set(labels) | set(self.labels) if labels.get(name) != self.labels.get(name)}
+
+        saved = {name: variable.get(name) for name in moved}
+        stats = {"encoded": 0, "patched": 0, "reused": 0}
+        words = []
+        try:
+            for name in moved:
+                if name in labels:
+                    variable.define(name, labels[name])
+                else:
+                    variable.pop(name, None)
+            if moved:
+                compiler.operand_cache.clear() # It holds the old label addresses
+
+            for j, record in enumerate(records):
+                if record is None or record[0] == "label":
+                    words.append(None)
+                    continue
+                i = origin[j]
+                if i is None:
+                    binary = Instruction.encode(new_lines[j], j + 1)
+                    words.append((binary, int(binary, 2)))
+                    stats["encoded"] += 1
+                    continue
+                refs = [(field, name) for field, name in record[1] if name in moved] if moved else None
+                if not refs:
+                    words.append(self.words[i])
+                    stats["reused"] += 1
+                    continue
+                value = self.words[i][1]
+                for field, name in refs:
+                    if not (0 <= labels.get(name, -1) < 2**Length.opAddr):
+                        Instruction.encode(new_lines[j], j + 1) # Raises the compiler's error for this line
+                    value = patch(value, field, labels[name])
+                words.append((format(value, f"0{Length.instrxn}b"), value))
+                stats["patched"] += 1
+        except ValueError:
+            for name, value in saved.items(): # Keep the previous compile usable
+                if value is None:
+                    variable.pop(name, None)
+                else:
+                    variable[name] = value
+            compiler.operand_cache.clear()
+            raise
+
+        # Store the words that are new or moved and clear the ones past the new end
+        encoded = []
+        pcs = []
+        variable.source.clear()
+        pc = self.base
+        for j, word in enumerate(words):
+            if word is None:
+                pcs.append(None)
+                continue
+            i = origin[j]
+            if i is None or self.pcs[i] != pc or self.words[i] is not word:
+                memory.store(pc, word[1])
+            encoded.append((pc, word[0], word[1]))
+            pcs.append(pc)
+            variable.source[pc] = (None, j + 1)
+            pc += 1
+        for stale in range(pc, self.base + len(self.encoded)):
+            memory.store(stale, 0)
+
+        self.lines, self.records, self.words, self.pcs, self.labels = new_lines, records, words, pcs, labels
+        self.encoded = encoded
+        self.stats = stats
+        return encoded
+
+    def program(self):
+        """Returns a Program loaded with the last compile (see Program.fromImage)."""
+        from run import Program
+        return Program.fromImage(self.encoded)
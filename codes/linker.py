@@ -0,0 +1,207 @@
+# linker.py
+"""
+Relocatable object modules and a linker that lays them out into one image.
+
+A module is compiled once, with its labels at offsets from 0 and a relocation entry for every
+operand that names a label (its own or another module's). link() places the modules one after
+another, resolves the references and patches the address fields.
+
+Usage: python linker.py compile source.isa object.json
+       python linker.py run main.json lib.json ...
+"""
+
+import json
+import sys
+
+from storage import variable
+from convert import Length
+import compiler
+from compiler import Instruction, operandPattern, tokenPattern
+
+VERSION = 1
+
+class Module:
+    """
+    A compiled, not yet placed module.
+    code: [(offset, instruction_int, source line)]; symbols: {label: offset} for its DEF/DEB labels;
+    relocations: [(offset, operand field 1 or 2, label)] for operands whose address is a label.
+    """
+    def __init__(self, name, code, symbols, relocations, layout=None):
+        self.name = name
+        self.code = code
+        self.symbols = symbols
+        self.relocations = relocations
+        self.layout = layout if layout is not None else Module.currentLayout()
+
+    @staticmethod
+    def currentLayout():
+        return {"instrxn": Length.instrxn, "opCode": Length.opCode, "opMode": Length.opMode, "opAddr": Length.opAddr}
+
+    @staticmethod
+    def labelOf(operand):
+        """Returns the label named by a direct or [label] operand, or None (registers, numbers, M#, ...)."""
+        match = operandPattern().fullmatch(operand)
+        if match is None:
+            return None
+        if match.lastgroup == "indirect":
+            return Module.labelOf(match.group("indirect"))
+        if match.lastgroup == "direct" and variable.namespace(operand) == "label":
+            return operand
+        return None
+
+    @staticmethod
+    def compile(program_lines, name="module"):
+        """
+        Compiles source lines into a Module. Labels not defined in the source are external
+        references, resolved by link(). The global 'variable' table is left as it was.
+        """
+        lines = [(number, line.strip()) for number, line in enumerate(program_lines, start=1)]
+        lines = [(number, line) for number, line in lines if line and not line.startswith("#")]
+
+        # First pass: label offsets, as preEncode does from PC 0
+        symbols = {}
+        offset = 0
+        for number, line in lines:
+            parts = line.split()
+            if parts[0].upper() in ("DEF", "DEB"):
+                if parts[1] in symbols:
+                    raise ValueError(f"Module {name}, line {number}: label {parts[1]} defined twice")
+                if variable.namespace(parts[1]) != "label":
+                    raise ValueError(f"Module {name}, line {number}: label {parts[1]} is a {variable.namespace(parts[1])} name")
+                symbols[parts[1]] = offset
+            else:
+                offset += 1
+
+        # Second pass: encode with every referenced label temporarily in 'variable'
+        # (externals as 0) and remember where each one was used.
+        code, relocations = [], []
+        saved = {}
+        try:
+            offset = 0
+            for number, line in lines:
+                tokens = tokenPattern().findall(line)
+                if tokens[0].upper() in ("DEF", "DEB"):
+                    continue
+                for field, operand in enumerate(tokens[1:3], start=1):
+                    label = Module.labelOf(operand)
+                    if label is None:
+                        continue
+                    if label not in saved:
+                        saved[label] = variable.get(label)
+                        variable[label] = symbols.get(label, 0)
+                    relocations.append((offset, field, label))
+                code.append((offset, int(Instruction.encode(line, number), 2), number))
+                offset += 1
+        finally:
+            for label, value in saved.items():
+                if value is None:
+                    del variable[label]
+                else:
+                    variable[label] = value
+            compiler.operand_cache.clear() # It holds the placeholder addresses
+        return Module(name, code, symbols, relocations)
+
+    def externals(self):
+        return sorted({label for _, _, label in self.relocations if label not in self.symbols})
+
+    def toDict(self):
+        return {"version": VERSION, "name": self.name, "layout": self.layout, "code": self.code,
+                "symbols": self.symbols, "relocations": self.relocations}
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.toDict(), f, indent=2)
+
+    @staticmethod
+    def load(path):
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("version") != VERSION:
+            raise ValueError(f"Not an object module: {path}")
+        return Module(data["name"], [tuple(entry) for entry in data["code"]], data["symbols"],
+                      [tuple(entry) for entry in data["relocations"]], data["layout"])
+
+def fieldStart(field):
+    """Bit position (from the most significant bit) of operand 'field''s address."""
+    start = Length.opCode + Length.opMode
+    if field == 2:
+        start += Length.opAddr + Length.opMode
+    return start
+
+def patch(instruction_int, field, address):
+    shift = Length.instrxn - fieldStart(field) - Length.opAddr
+    mask = ((1 << Length.opAddr) - 1) << shift
+    return (instruction_int & ~mask) | (address << shift)
+
+def link(modules, base=0):
+    """
+    Lays the modules out one after another from 'base' (the first one is entered at 'base').
+    Returns (image, symbols, line_map): image is a list of (pc, instruction_int) for
+    Program.fromImage, symbols maps each label to its address and line_map maps each pc to
+    (module name, source line). Raises ValueError for unresolved or ambiguous references.
+    """
+    layout = Module.currentLayout()
+    placed = []
+    exported = {}
+    pc = base
+    for module in modules:
+        if module.layout != layout:
+            raise ValueError(f"Module {module.name} was compiled for a different instruction layout")
+        placed.append((module, pc))
+        for label, offset in module.symbols.items():
+            exported.setdefault(label, []).append((module.name, pc + offset))
+        pc += len(module.code)
+
+    problems = []
+    image, symbols, line_map = [], {}, {}
+    for module, start in placed:
+        code = {offset: instruction_int for offset, instruction_int, _ in module.code}
+        for offset, field, label in module.relocations:
+            if label in module.symbols: # Own labels win over other modules' ones
+                address = start + module.symbols[label]
+            elif len(exported.get(label, ())) == 1:
+                address = exported[label][0][1]
+            else:
+                where = "undefined" if label not in exported else "defined in " + ", ".join(name for name, _ in exported[label])
+                problems.append(f"Module {module.name}, offset {offset}: {label} is {where}")
+                continue
+            if not (0 <= address < 2**Length.opAddr):
+                problems.append(f"Module {module.name}, offset {offset}: address {address} of {label} does not fit the {Length.opAddr}-bit address field")
+                continue
+            code[offset] = patch(code[offset], field, address)
+        for offset, _, source_line in module.code:
+            image.append((start + offset, code[offset]))
+            line_map[start + offset] = (module.name, source_line)
+        for label, offset in module.symbols.items():
+            symbols.setdefault(label, start + offset)
+    if problems:
+        raise ValueError("Link failed:\n" + "\n".join(problems))
+    return image, symbols, line_map
+
+def load(modules, base=0):
+    """
+    Links the modules and loads the image; their labels are added to 'variable' and their
+    (module name, line) locations to its source map, for the debugger, disassembler and messages.
+    PC is set to base, so the program starts at the first instruction of the first module.
+    """
+    from run import Program
+    image, symbols, line_map = link(modules, base)
+    program = Program.fromImage(image, entry=base)
+    variable.update(symbols)
+    variable.source.clear()
+    variable.source.update(line_map)
+    return program
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "compile":
+        with open(sys.argv[2]) as f:
+            source = f.readlines()
+        name = sys.argv[2].rsplit("/", 1)[-1].rsplit(".", 1)[0]
+        module = Module.compile(source, name)
+        module.save(sys.argv[3])
+        print(f"Compiled {name}: {len(module.code)} instructions, {len(module.symbols)} labels, external: {', '.join(module.externals()) or 'none'}")
+    elif len(sys.argv) > 2 and sys.argv[1] == "run":
+        load([Module.load(path) for path in sys.argv[2:]]).run()
+    else:
+        print("\n".join(__doc__.strip().splitlines()[-2:]))
+        sys.exit(2)
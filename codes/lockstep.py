@@ -0,0 +1,239 @@
+# lockstep.py
+
+try:
+    import numpy as np
+except ImportError: # Optional: only lockstep execution needs NumPy
+    np = None
+
+from storage import register, memory, variable
+from convert import Precision
+from compiler import Instruction
+from addressing import AddressingMode
+from run import division_by_zero_exception
+
+conditional_jumps = ["JEQ", "JNE", "JLT", "JLE", "JGT", "JGE"]
+
+class Lockstep:
+    """
+    Runs one loaded Program over many input sets at once. Every register and memory slot is a
+    NumPy row with one lane per input set, so each instruction is fetched, decoded and dispatched
+    once per group of lanes instead of once per input set.
+
+    inputs[lane] is the sequence of values the lane's SCANs read, in order. Lanes sharing a PC
+    form a group; when a jump, CALL or RET sends lanes of a group to different addresses, the
+    group is split. A DIV by zero ends only the lanes that divided by zero (exit code 1,
+    as Program.exception) and the others continue.
+
+    Lane values follow Storage: a float written to a register or memory is rounded through its
+    spbin bit pattern, as Program's stores do. The lane type comes from the inputs: int64 when they
+    are all integers, float64 when they are all floats and object (each value keeps its Python
+    type, as in Program.run) when they mix both.
+
+    Differences from Program.run: PRNT output is collected in self.printed instead of printed,
+    code is taken from the loaded image (stores into code do not change what executes), and
+    addresses outside the register file or memory raise ValueError instead of growing the storage,
+    integer lanes are int64, which wraps on overflow, and float64 lanes hold integer results as
+    floats (3.0 where Program prints 3); pass dtype=object for exact Python ints and floats.
+    Memory costs memory.max_size * lanes words.
+    """
+    def __init__(self, program, inputs, dtype=None):
+        if np is None:
+            raise ImportError("Lockstep execution needs NumPy; install it with 'pip install numpy'")
+        self.inputs = np.atleast_2d(np.asarray(inputs))
+        if dtype is None:
+            if self.inputs.dtype.kind in "iub":
+                dtype = np.int64
+            elif any(isinstance(value, (int, np.integer)) for value in np.ravel(np.asarray(inputs, dtype=object))):
+                dtype = object # Mixed inputs: float64 would turn the integer ones into floats
+            else:
+                dtype = np.float64
+        if dtype is object:
+            self.inputs = np.atleast_2d(np.asarray(inputs, dtype=object))
+        else:
+            self.inputs = self.inputs.astype(dtype)
+        # Lanes that can hold floats round every stored value, see stored()
+        self.rounded = np.frompyfunc(Lockstep.roundFloat, 1, 1) if np.dtype(dtype).kind in "fO" else None
+        lanes = self.inputs.shape[0]
+
+        self.code = {pc: Instruction.decode(instruction_int) for pc, _, instruction_int in program.encoded}
+        self.entry = int(register.load(variable['PC']))
+        self.registers = self.expand(register, max(register.max_size, max(register.data) + 1), lanes, dtype)
+        self.memory = self.expand(memory, max(memory.max_size, 1), lanes, dtype)
+        self.scanned = np.zeros(lanes, dtype=np.int64) # SCAN inputs used by each lane
+        self.exit_codes = np.full(lanes, -1, dtype=np.int64) # -1: stopped without EOP or an exception
+        self.printed = [] # (pc, lanes, values) for every PRNT; values is the message for DIV by zero
+        self.warned = set()
+        self.tsp = variable['TSP']
+        self.spr = variable['SPR']
+
+    @staticmethod
+    def expand(storage, size, lanes, dtype):
+        """Copies a Storage into a (size, lanes) array: every lane starts from the same contents."""
+        rows = np.zeros((size, lanes), dtype=dtype)
+        for address in list(storage.data):
+            if 0 <= address < size:
+                rows[address] = storage.load(address)
+        return rows
+
+    @staticmethod
+    def roundFloat(value):
+        if isinstance(value, float):
+            return Precision.spbin2dec(Precision.dec2spbin(value))
+        return value
+
+    def stored(self, values):
+        """Values as Storage keeps them: floats rounded through their spbin pattern, ints unchanged."""
+        if self.rounded is None:
+            return values
+        return self.rounded(values)
+
+    def address(self, values, rows, lanes):
+        """Checks per-lane addresses into 'rows' and returns them as ints."""
+        addresses = np.asarray(values).astype(np.int64)
+        if addresses.size and (addresses.min() < 0 or addresses.max() >= rows.shape[0]):
+            raise ValueError(f"Lanes {lanes[(addresses < 0) | (addresses >= rows.shape[0])].tolist()} address outside 0..{rows.shape[0] - 1}")
+        return addresses
+
+    # --- Operands ---
+
+    def read(self, addr, mode, lanes):
+        """Per-lane value of a source operand (auto-increments *R# as Program.execute does)."""
+        if mode == AddressingMode.register(None):
+            return self.registers[addr, lanes]
+        if mode == AddressingMode.immediate(None):
+            return np.full(len(lanes), addr, dtype=self.registers.dtype)
+        if mode == AddressingMode.autoinc(None):
+            pointers = self.registers[addr, lanes]
+            self.registers[addr, lanes] = pointers + 1
+            return self.memory[self.address(pointers, self.memory, lanes), lanes]
+        return self.memory[self.effective(addr, mode, lanes), lanes]
+
+    def effective(self, addr, mode, lanes):
+        """Per-lane memory address of a memory operand (direct, *R#, [x], A#)."""
+        if mode == AddressingMode.direct(None):
+            return np.full(len(lanes), addr, dtype=np.int64)
+        if mode in (AddressingMode.register_indirect(None), AddressingMode.indexed(None)):
+            return self.address(self.registers[addr, lanes], self.memory, lanes)
+        if mode == AddressingMode.indirect(None):
+            return self.address(self.memory[addr, lanes], self.memory, lanes)
+        raise ValueError(f"Operand mode {mode} does not name a memory address")
+
+    def write(self, addr, mode, lanes, values):
+        values = self.stored(values)
+        if mode == AddressingMode.register(None):
+            self.registers[addr, lanes] = values
+        elif mode == AddressingMode.immediate(None):
+            raise ValueError("Attempted to write to an immediate value")
+        else:
+            self.memory[self.effective(addr, mode, lanes), lanes] = values
+
+    # --- Execution ---
+
+    def run(self):
+        """Runs every lane to EOP, an exception or an address outside the code; returns the exit codes."""
+        groups = [(self.entry, np.arange(self.inputs.shape[0]))]
+        while groups:
+            pc, lanes = groups.pop()
+            while len(lanes):
+                if pc not in self.code or self.code[pc][0] == "UNKNOWN":
+                    break # Program.run stops on unknown opcodes; data past the code is not run
+                self.registers[variable['PC'], lanes] = pc + 1
+                lanes, target = self.execute(pc, lanes, *self.code[pc])
+                if target is None:
+                    pc += 1
+                    continue
+                if target is False or not len(lanes): # EOP
+                    break
+                targets = np.unique(target)
+                for other in targets[1:]:
+                    groups.append((int(other), lanes[target == other]))
+                lanes = lanes[target == targets[0]]
+                pc = int(targets[0])
+        return self.exit_codes
+
+    def push(self, lanes, values):
+        tops = self.registers[self.tsp, lanes] + 1
+        self.registers[self.tsp, lanes] = tops
+        self.memory[self.address(tops, self.memory, lanes), lanes] = self.stored(values)
+
+    def pop(self, lanes, what):
+        tops = self.registers[self.tsp, lanes]
+        if np.any(tops < self.registers[self.spr, lanes]):
+            raise IndexError(f"Stack Underflow: Attempted to {what} from an empty stack.")
+        values = self.memory[self.address(tops, self.memory, lanes), lanes]
+        self.registers[self.tsp, lanes] = tops - 1
+        return values
+
+    def execute(self, pc, lanes, opcode_str, op1_addr_binary, op1_mode_binary, op2_addr_binary, op2_mode_binary):
+        """
+        Executes one instruction for a group of lanes. Returns (lanes still running, target):
+        target is None to continue at pc + 1, False when the lanes ended, or per-lane addresses.
+        """
+        op1, mode1 = int(op1_addr_binary, 2), op1_mode_binary
+        op2, mode2 = int(op2_addr_binary, 2), op2_mode_binary
+
+        if opcode_str in ("ADD", "SUB", "MUL", "DIV"):
+            val1 = self.read(op1, mode1, lanes)
+            val2 = self.read(op2, mode2, lanes)
+            if opcode_str == "ADD":
+                result = val1 + val2
+            elif opcode_str == "SUB":
+                result = val1 - val2
+            elif opcode_str == "MUL":
+                result = val1 * val2
+            else:
+                zero = val2 == 0
+                if zero.any(): # Those lanes end as Program.exception ends the program
+                    self.exit_codes[lanes[zero]] = 1
+                    self.printed.append((pc, lanes[zero], division_by_zero_exception.message))
+                    lanes, val1, val2 = lanes[~zero], val1[~zero], val2[~zero]
+                result = val1 // val2
+            self.write(op1, mode1, lanes, result)
+
+        elif opcode_str == "MOV":
+            self.write(op2, mode2, lanes, self.read(op1, mode1, lanes))
+
+        elif opcode_str == "PRNT":
+            self.printed.append((pc, lanes, self.read(op1, mode1, lanes).copy()))
+
+        elif opcode_str == "PUSH":
+            self.push(lanes, self.read(op1, mode1, lanes))
+
+        elif opcode_str == "POP":
+            self.write(op1, mode1, lanes, self.pop(lanes, "pop"))
+
+        elif opcode_str == "SCAN":
+            used = self.scanned[lanes]
+            if np.any(used >= self.inputs.shape[1]):
+                raise ValueError(f"Lanes {lanes[used >= self.inputs.shape[1]].tolist()} ran out of SCAN inputs")
+            self.scanned[lanes] = used + 1
+            self.write(op1, mode1, lanes, self.inputs[lanes, used])
+
+        elif opcode_str in ("JMP", "CALL"):
+            target = self.effective(op1, mode1, lanes) # Register and immediate targets raise, as in Program.execute
+            if opcode_str == "CALL":
+                self.push(lanes, np.full(len(lanes), pc + 1, dtype=self.memory.dtype))
+            return lanes, target
+
+        elif opcode_str == "RET":
+            return lanes, self.address(self.pop(lanes, "return"), self.memory, lanes)
+
+        elif opcode_str == "EOP":
+            self.exit_codes[lanes] = 0
+            return lanes, False
+
+        elif opcode_str in conditional_jumps or opcode_str == "MOD":
+            # Not implemented by Program.execute either; warn once instead of once per execution
+            if opcode_str not in self.warned:
+                self.warned.add(opcode_str)
+                print(f"WARNING: Opcode {opcode_str} is not fully implemented yet.")
+
+        return lanes, None
+
+    # --- Results ---
+
+    def value(self, addr, typ='register'):
+        """Per-lane contents of a register or memory slot, by address or name (e.g. 'R1')."""
+        if isinstance(addr, str):
+            addr = variable[addr]
+        return (self.registers if typ == 'register' else self.memory)[addr]
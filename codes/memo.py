@@ -0,0 +1,156 @@
+# memo.py
+
+from collections import OrderedDict
+
+from storage import register, memory, variable
+from compiler import Instruction
+from addressing import AddressingMode
+
+pure_operations = ["MOV", "ADD", "SUB", "MUL", "DIV", "PUSH", "POP", "JMP", "RET"]
+
+class Routine:
+    """
+    A pure subroutine: the register addresses it may read (inputs) and write (outputs), and
+    how many stack slots above its return address it pushes at most (depth).
+    """
+    def __init__(self, entry, inputs, outputs, depth=0):
+        self.entry = entry
+        self.inputs = tuple(sorted(inputs))
+        self.outputs = tuple(sorted(outputs))
+        self.depth = depth
+
+class Memo:
+    """
+    Result cache for pure subroutines, used by the CALL branch of Program.execute (see
+    Program.memoize). A subroutine is pure when every path from its entry reaches a RET with a
+    balanced stack and uses only MOV, arithmetic, PUSH/POP and JMP on R1..R7 and immediates.
+    Its result then depends only on the input registers: a call with cached inputs stores the
+    cached output registers, writes the return address and the body's scratch stack slots above
+    TSP as the body would have left them, and skips the body. On a miss the body runs inside
+    the CALL, out of sight of run() monitors.
+    """
+    def __init__(self, encoded, size=256):
+        self.size = size
+        self.routines = Memo.analyse(encoded)
+        self.cache = OrderedDict() # (entry, input values) -> (output values, scratch stack values), least recently used first
+        self.hits = 0
+        self.misses = 0
+        self.pending = None # Key of the call being recorded
+
+    @staticmethod
+    def analyse(encoded):
+        """Returns {entry pc: Routine} for the CALL targets of an encoded program that are pure."""
+        decoded = {pc: Instruction.decode(instruction_int) for pc, _, instruction_int in encoded}
+        general = {variable[f"R{i}"] for i in range(1, 8)} | {0} # 0: an empty operand slot
+        targets = {int(fields[1], 2) for fields in decoded.values()
+                   if fields[0] == "CALL" and fields[2] == AddressingMode.direct(None)}
+        routines = {}
+        for entry in targets:
+            routine = Memo.analyseRoutine(decoded, entry, general)
+            if routine is not None:
+                routines[entry] = routine
+        return routines
+
+    @staticmethod
+    def analyseRoutine(decoded, entry, general):
+        # Without conditional jumps there is a single path, followed in order, so the inputs
+        # are the registers read before the routine writes them.
+        reads, writes = set(), set()
+
+        def register_operand(addr_binary, mode_binary, written):
+            if mode_binary == AddressingMode.immediate(None) and not written:
+                return True
+            address = int(addr_binary, 2)
+            if mode_binary != AddressingMode.register(None) or address not in general:
+                return False
+            if written:
+                writes.add(address)
+            elif address not in writes:
+                reads.add(address)
+            return True
+
+        depth_at = {}
+        deepest = 0
+        pending = [(entry, 0)]
+        while pending:
+            pc, depth = pending.pop()
+            if pc in depth_at:
+                if depth_at[pc] != depth:
+                    return None
+                continue
+            if pc not in decoded or decoded[pc][0] not in pure_operations:
+                return None
+            depth_at[pc] = depth
+            opcode_str, op1_addr, op1_mode, op2_addr, op2_mode = decoded[pc]
+
+            if opcode_str == "RET":
+                if depth != 0:
+                    return None
+                continue
+            if opcode_str == "JMP":
+                if op1_mode != AddressingMode.direct(None):
+                    return None
+                pending.append((int(op1_addr, 2), depth))
+                continue
+            if opcode_str == "PUSH":
+                ok = register_operand(op1_addr, op1_mode, False)
+                depth += 1
+            elif opcode_str == "POP":
+                ok = register_operand(op1_addr, op1_mode, True)
+                depth -= 1
+            elif opcode_str == "MOV":
+                ok = register_operand(op1_addr, op1_mode, False) and register_operand(op2_addr, op2_mode, True)
+            else: # ADD, SUB, MUL, DIV read both operands and write the first
+                ok = register_operand(op1_addr, op1_mode, False) and register_operand(op2_addr, op2_mode, False) \
+                    and register_operand(op1_addr, op1_mode, True)
+            if not ok or depth < 0:
+                return None
+            deepest = max(deepest, depth)
+            pending.append((pc + 1, depth))
+        return Routine(entry, reads, writes, deepest)
+
+    def replay(self, target):
+        """
+        CALL hook: on a hit, stores the cached outputs and the stack slots the call would have
+        written (the return address, already in PC, and the scratch slots) and returns True;
+        otherwise remembers the key.
+        """
+        routine = self.routines.get(target)
+        if routine is None:
+            return False
+        # Typed: 3 and 3.0 are equal keys but give different results (4 and 4.0)
+        key = (target, tuple([(type(value), value) for value in map(register.load, routine.inputs)]))
+        cached = self.cache.get(key)
+        if cached is None:
+            self.misses += 1
+            self.pending = key
+            return False
+        self.hits += 1
+        self.cache.move_to_end(key)
+        outputs, scratch = cached
+        for address, value in zip(routine.outputs, outputs):
+            register.store(address, value)
+        top = register.load(variable['TSP'])
+        memory.store(top + 1, register.load(variable['PC']))
+        for offset, value in enumerate(scratch, start=2):
+            memory.store(top + offset, value)
+        return True
+
+    def record(self, program, target, return_address):
+        """
+        CALL hook after the return address was pushed: on a miss, runs the body with
+        program.step() until its RET and caches the output registers and scratch stack slots.
+        """
+        key, self.pending = self.pending, None
+        if key is None or key[0] != target:
+            return
+        pc_address, tsp_address = variable['PC'], variable['TSP']
+        base = register.load(tsp_address) - 1
+        while register.load(pc_address) != return_address or register.load(tsp_address) != base:
+            if program.step() is None:
+                return
+        routine = self.routines[target]
+        self.cache[key] = (tuple([register.load(address) for address in routine.outputs]),
+                           tuple([memory.load(base + offset) for offset in range(2, routine.depth + 2)]))
+        if len(self.cache) > self.size:
+            self.cache.popitem(last=False)
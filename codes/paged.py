@@ -0,0 +1,44 @@
+# paged.py
+
+from collections.abc import MutableMapping
+
+from storage import page_bits
+
+class PagedData(MutableMapping):
+    """
+    Sparse address -> value mapping for Storage.data. Memory is kept in pages of 2**page_bits
+    words that are allocated (zero-filled) on first write, so untouched address ranges cost nothing.
+    """
+    def __init__(self, data={}):
+        self.pages = {}
+        for address, value in data.items():
+            self[address] = value
+
+    def __getitem__(self, address):
+        page = self.pages.get(address >> page_bits)
+        if page is None:
+            raise KeyError(address)
+        return page[address & ((1 << page_bits) - 1)]
+
+    def __setitem__(self, address, value):
+        page = self.pages.get(address >> page_bits)
+        if page is None:
+            page = self.pages[address >> page_bits] = [0] * (1 << page_bits)
+        page[address & ((1 << page_bits) - 1)] = value
+
+    def __delitem__(self, address):
+        # Pages are never freed; a deleted word simply reads as 0 again.
+        page = self.pages.get(address >> page_bits)
+        if page is None:
+            raise KeyError(address)
+        page[address & ((1 << page_bits) - 1)] = 0
+
+    def __contains__(self, address):
+        return isinstance(address, int) and (address >> page_bits) in self.pages
+
+    def __iter__(self):
+        for page in list(self.pages):
+            yield from range(page << page_bits, (page + 1) << page_bits)
+
+    def __len__(self):
+        return len(self.pages) << page_bits
@@ -0,0 +1,136 @@
+# profiler.py
+
+import json
+import time
+
+from storage import register, memory, variable
+
+class Profiler:
+    """
+    Collects an ISA-level profile of Program.run: per-opcode counts and time,
+    a per-PC histogram, register/memory accesses by address and instructions per second.
+    Pass an instance to Program.run(profiler=...); runs without a profiler are not instrumented.
+    """
+    def __init__(self):
+        self.opcodes = {}           # opcode_str -> [count, nanoseconds]
+        self.pcs = {}               # pc -> count
+        self.stacks = {}            # "main;FUNC;OPCODE" -> [count, nanoseconds]
+        self.register_access = {}   # address -> [loads, stores]
+        self.memory_access = {}     # address -> [loads, stores]
+        self.instructions = 0
+        self.elapsed = 0.0
+        self._frames = ["main"]
+        self._labels = {}
+        self._pending = None
+        self._tsp = 0 # TSP before the CALL being executed
+        self._hooks = [] # (storage, hook handle) installed by start()
+        self._started = 0
+
+    # --- Monitor protocol (see Program.runMonitored) ---
+
+    def start(self):
+        self._labels = variable.symbols("label") # Program labels by address
+        self._hook(register, self.register_access)
+        self._hook(memory, self.memory_access)
+        self._started = time.perf_counter()
+
+    def enter(self, pc, instruction_int, opcode_str):
+        self._pending = (pc, opcode_str, time.perf_counter_ns())
+        if opcode_str == "CALL":
+            self._tsp = register.data[variable['TSP']]
+
+    def leave(self):
+        pc, opcode_str, began = self._pending
+        self._pending = None
+        spent = time.perf_counter_ns() - began
+        self._account(pc, opcode_str, spent)
+
+        if opcode_str == "CALL" and register.data[variable['TSP']] > self._tsp:
+            # A memoized CALL replays or runs the body inside the CALL and pushes nothing, so
+            # there is no RET to pop a frame for; its time stays with the caller.
+            target = register.data[variable['PC']]
+            self._frames.append(self._labels.get(target, f"pc_{target}"))
+        elif opcode_str == "RET" and len(self._frames) > 1:
+            self._frames.pop()
+
+    def stop(self):
+        # EOP and exceptions leave through sys.exit() inside execute, so close the last instruction here.
+        if self._pending is not None:
+            pc, opcode_str, began = self._pending
+            self._pending = None
+            self._account(pc, opcode_str, time.perf_counter_ns() - began)
+        self.elapsed += time.perf_counter() - self._started
+        for storage, handle in self._hooks:
+            storage.unhook(handle)
+        self._hooks = []
+
+    # --- Collection helpers ---
+
+    def _account(self, pc, opcode_str, spent):
+        self.instructions += 1
+        entry = self.opcodes.setdefault(opcode_str, [0, 0])
+        entry[0] += 1
+        entry[1] += spent
+        self.pcs[pc] = self.pcs.get(pc, 0) + 1
+        stack = self.stacks.setdefault(";".join(self._frames) + ";" + opcode_str, [0, 0])
+        stack[0] += 1
+        stack[1] += spent
+
+    def _hook(self, storage, counts):
+        """Hooks counting wrappers around load/store of one Storage instance until stop()."""
+        def countLoads(load):
+            def counting_load(address, isCode=False):
+                counts.setdefault(address, [0, 0])[0] += 1
+                return load(address, isCode)
+            return counting_load
+
+        def countStores(store):
+            def counting_store(address, value):
+                counts.setdefault(address, [0, 0])[1] += 1
+                return store(address, value)
+            return counting_store
+
+        self._hooks.append((storage, storage.hook('load', countLoads)))
+        self._hooks.append((storage, storage.hook('store', countStores)))
+
+    # --- Reports ---
+
+    def ips(self):
+        """Returns the executed instructions per second."""
+        return self.instructions / self.elapsed if self.elapsed else 0.0
+
+    def toDict(self):
+        def accesses(counts):
+            return {str(k): {"load": v[0], "store": v[1]} for k, v in counts.items()}
+        return {
+            "instructions": self.instructions,
+            "elapsed": self.elapsed,
+            "ips": self.ips(),
+            "opcodes": {k: {"count": v[0], "time_ns": v[1]} for k, v in self.opcodes.items()},
+            "pcs": {str(k): v for k, v in sorted(self.pcs.items())},
+            "register_access": accesses(self.register_access),
+            "memory_access": accesses(self.memory_access),
+        }
+
+    def dumpJSON(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.toDict(), f, indent=2)
+
+    def collapsed(self, weight="count"):
+        """
+        Returns the profile in collapsed-stack format ("main;FUNC;OPCODE value" per line),
+        as read by flamegraph.pl and speedscope. weight is "count" or "time" (nanoseconds).
+        """
+        index = 0 if weight == "count" else 1
+        return "\n".join(f"{stack} {v[index]}" for stack, v in self.stacks.items()) + "\n"
+
+    def dumpCollapsed(self, path, weight="count"):
+        with open(path, 'w') as f:
+            f.write(self.collapsed(weight))
+
+    def dispProfile(self):
+        print(f"Instructions: {self.instructions} in {self.elapsed:.6f}s ({self.ips():.0f} instr/s)")
+        for opcode_str, (count, spent) in sorted(self.opcodes.items(), key=lambda kv: -kv[1][1]):
+            print(f"{opcode_str}: {count} executed, {spent / 1e6:.3f} ms")
+        for pc, count in sorted(self.pcs.items(), key=lambda kv: -kv[1])[:10]:
+            print(f"PC {pc}: {count}")
@@ -2,11 +2,9 @@ from storage import register, memory, variable
 from convert import Precision, Length, Value
 from addressing import Access, AddressingMode
 from compiler import Instruction, operations, operationCodes_EW # Import operations and operationCodes_EW directly
+from snapshot import Snapshot
 import sys # For exit in EOP
 
-# Global exception instance for division by zero
-division_by_zero_exception = None
-
 class Except:
     def __init__(self, message, occur=False, ret_val=0):
         self.message = message
@@ -29,29 +27,129 @@ class Except:
         """Returns the return value of the exception."""
         return self.ret
 
+# Global exception instance for division by zero
+division_by_zero_exception = Except("Attempted division by zero.")
+
+# Register values set by Program.__init__ before a program is loaded.
+program_registers = {
+    'PC': 0,
+    'IR': 0,    # Instruction Register (will hold current instruction address)
+    'SPR': 112, # Stack Pointer Register (base of stack area)
+    'TSP': 111, # Top Stack Pointer (initially points before first stack slot)
+    'BPR': 168, # Block Pointer Register (base of block area)
+    'NBP': 167, # Assuming NBP is just below BPR for now
+    'CPR': 152, # Assuming CPR is constant pointer
+    'NCP': 151, # Assuming NCP is just below CPR
+    'VPR': 200, # Assuming VPR is variable pointer
+    'NVP': 199, # Assuming NVP is just below VPR
+    'MPR': 216, # Assuming MPR is message pointer
+    'NMP': 215, # Assuming NMP is just below MPR
+}
+
 class Program:
-    def __init__(self, program_lines):
+    def __init__(self, program_lines, inline_limit=0, source_name=None, verbose=True):
+        self.resetRegisters()
+
+        # Encode the program during construction
+        # The Instruction.encodeProgram handles both pre-encode (first pass) and encoding (second pass)
+        # inline_limit > 0 also inlines small leaf subroutines at their CALL sites
+        # source_name is recorded in the source map; verbose=False keeps the label listing quiet
+        self.encoded = Instruction.encodeProgram(program_lines, inline_limit, source_name, verbose)
+        self.verified = None # pc -> decoded instruction, set by verify()
+        self.compiled = None # pc -> (instruction_int, closure), set by verify()
+        self.memo = None # Pure subroutine result cache, set by memoize()
+        print("Program successfully compiled and loaded into memory.")
+
+
+    @classmethod
+    def fromImage(cls, image, entry=None):
+        """
+        Loads an already compiled image, pairs of (pc, instruction_int) such as the
+        (pc, binary, int) entries returned by Instruction.encodeProgram, without recompiling.
+        entry: address stored into PC to start from; the reset PC is kept when None.
+        """
+        program = cls.__new__(cls)
+        program.resetRegisters()
+        program.encoded = []
+        program.verified = None
+        program.compiled = None
+        program.memo = None
+        for word in image:
+            memory.store(word[0], word[-1])
+            program.encoded.append((word[0], format(word[-1], f"0{Length.instrxn}b"), word[-1]))
+        if entry is not None:
+            register.store(variable['PC'], entry)
+        return program
+
+
+    @staticmethod
+    def resetRegisters():
+        """Initializes storage sizes and the special registers before a program is loaded."""
         register.setStorage(32) # Initialize 32 registers
         memory.setStorage(256) # Initialize 256 memory slots
 
         # Use variable dictionary to get numeric addresses for registers
-        register.store(variable['PC'], 0)
-        register.store(variable['IR'], 0)   # Instruction Register (will hold current instruction address)
-        register.store(variable['SPR'], 112) # Stack Pointer Register (base of stack area)
-        register.store(variable['TSP'], 111) # Top Stack Pointer (initially points before first stack slot)
-        register.store(variable['BPR'], 168) # Block Pointer Register (base of block area)
-        register.store(variable['NBP'], 167) # Assuming NBP is just below BPR for now
-        register.store(variable['CPR'], 152) # Assuming CPR is constant pointer
-        register.store(variable['NCP'], 151) # Assuming NCP is just below CPR
-        register.store(variable['VPR'], 200) # Assuming VPR is variable pointer
-        register.store(variable['NVP'], 199) # Assuming NVP is just below VPR
-        register.store(variable['MPR'], 216) # Assuming MPR is message pointer
-        register.store(variable['NMP'], 215) # Assuming NMP is just below MPR
+        for name, value in program_registers.items():
+            register.store(variable[name], value)
+
+
+    def verify(self):
+        """
+        Checks the loaded program once with verifier.Verifier (raises ValueError on failure).
+        Afterwards run() uses runVerified(), which runs the instructions compiled by
+        compileVerified() instead of fetching, decoding and checking each one.
+        """
+        from verifier import Verifier # Only needed for verified runs; keeps startup imports small
+        self.verified = Verifier.verify(self.encoded)
+        self.compiled = self.compileVerified()
+        return self.verified
+
+
+    def memoize(self, size=256):
+        """
+        Marks the pure subroutines of the loaded program (see memo.Memo) and caches up to 'size'
+        of their results; CALLs with cached inputs then skip the body. Returns the Memo.
+        """
+        from memo import Memo # Only needed for memoized runs; keeps startup imports small
+        self.memo = Memo(self.encoded, size)
+        return self.memo
+
+
+    def snapshot(self):
+        """
+        Captures the loaded VM state so repeated runs can start from it again with restore().
+        Only the pages written after the capture are copied back.
+        """
+        return Snapshot()
 
-        # Encode the program during construction
-        # The Instruction.encodeProgram handles both pre-encode (first pass) and encoding (second pass)
-        Instruction.encodeProgram(program_lines)
-        print("Program successfully compiled and loaded into memory.")
+
+    def restore(self, snapshot):
+        """Resets registers, memory and labels to 'snapshot'. Returns the number of pages restored."""
+        return snapshot.restore()
+
+
+    @staticmethod
+    def where(pc):
+        """Describes a code address for messages, e.g. "PC: 4 (LOOP, test_program.isa:7)"."""
+        details = [detail for detail in (variable.symbol(pc), variable.locate(pc)) if detail is not None]
+        return f"PC: {pc}" + (f" ({', '.join(details)})" if details else "")
+
+
+    @staticmethod
+    def loadMemory(address, flow=("mem",)):
+        """Access.data(address, flow) for memory operands, without its lookup chain for in-range int addresses."""
+        if isinstance(address, int) and (address in memory.data or 0 <= address < memory.max_size):
+            return memory.load(address)
+        return Access.data(address, flow=list(flow)) # Other spellings, or its error for a bad address
+
+
+    @staticmethod
+    def storeMemory(address, value):
+        """Access.store('memory', address, value) for int addresses."""
+        if isinstance(address, int):
+            memory.store(address, value)
+        else:
+            Access.store('memory', address, value)
 
 
     @staticmethod
@@ -256,6 +354,12 @@ class Program:
             self.write(op1_addr_binary, op1_mode_binary, popped_value) # Store popped value to destination
 
         elif opcode_str == "CALL":
+            target_address = op1_resolved[0]
+            if op1_resolved[1] != 'memory': # CALL targets are typically memory addresses (functions)
+                raise ValueError(f"CALL instruction expects a direct memory address as target, got {op1_resolved[1]}")
+            if self.memo is not None and self.memo.replay(target_address):
+                return # Output registers replayed from the cache; the body is skipped
+
             # Push current PC + 1 (return address) onto stack
             return_address = Access.data('PC', flow=["reg"])
             tsp_val = Access.data('TSP', flow=["reg"])
@@ -264,10 +368,9 @@ class Program:
             Access.store('memory', new_tsp, return_address)
             
             # Jump to target address
-            target_address = op1_resolved[0]
-            if op1_resolved[1] != 'memory': # CALL targets are typically memory addresses (functions)
-                raise ValueError(f"CALL instruction expects a direct memory address as target, got {op1_resolved[1]}")
             Access.store('register', 'PC', target_address) # Set PC to target address
+            if self.memo is not None:
+                self.memo.record(self, target_address, return_address) # Runs and caches the body on a miss
 
         elif opcode_str == "RET":
             # Pop return address from stack into PC
@@ -308,12 +411,43 @@ class Program:
             sys.exit(1)
 
 
-    def run(self):
+    def step(self):
+        """
+        Fetches, decodes and executes the instruction pointed by 'PC'.
+        Returns the executed (pc, instruction_int, opcode_str), or None if the opcode is unknown.
+        """
+        current_pc = Access.data('PC', flow=["reg"]) # Load current PC value
+        instruction_int = Access.data(current_pc, flow=["mem"], is_code=True)
+        decoded = Instruction.decode(instruction_int)
+
+        if decoded[0] == "UNKNOWN":
+            print(f"ERROR: Unknown opcode encountered: {format(instruction_int, f'0{Length.instrxn}b')[0:Length.opCode]} at {Program.where(current_pc)}")
+            return None
+
+        Access.store('register', 'PC', current_pc + 1)
+        self.execute(*decoded)
+        return (current_pc, instruction_int, decoded[0])
+
+
+    def run(self, profiler=None, tracer=None, coverage=None):
         """
         Executes each Instruction Code starting from the address pointed by 'PC'.
+        profiler: Optional profiler.Profiler; when given, the instrumented loop is used instead.
+        tracer: Optional tracer.TraceBuffer recording the last executed instructions.
+        coverage: Optional cover.Coverage marking executed addresses and branch directions.
         """
         print("Program execution started...")
-        
+
+        monitors = [m for m in (profiler, tracer, coverage) if m is not None]
+        if monitors:
+            self.runMonitored(monitors)
+            print("Program execution completed.")
+            return
+        if self.verified is not None:
+            self.runVerified()
+            print("Program execution completed.")
+            return
+
         while True:
             current_pc = Access.data('PC', flow=["reg"]) # Load current PC value
 
@@ -321,44 +455,14 @@ class Program:
             try:
                 instruction_int = Access.data(current_pc, flow=["mem"], is_code=True)
             except KeyError: # Should not happen if memory is properly initialized by setStorage
-                print(f"Attempted to fetch instruction from invalid memory address: {current_pc}")
+                print(f"Attempted to fetch instruction from invalid memory address: {Program.where(current_pc)}")
                 break # Halt if PC points to invalid memory
 
-            # Ensure 32-bit binary string representation
-            instruction_binary = format(instruction_int, '032b') 
-
-            # Decode instruction components
-            # Opcode is 7 bits now (EW (2) + Category (5))
-            opcode_binary = instruction_binary[0:7] 
-            op1_mode_binary = instruction_binary[7:10] # 3 bits
-            op1_addr_binary = instruction_binary[10:18] # 8 bits
-            op2_mode_binary = instruction_binary[18:21] # 3 bits
-            op2_addr_binary = instruction_binary[21:29] # 8 bits
-            # Remaining 3 bits (instruction_binary[29:32]) are extra/unused.
-
-            # Map opcode_binary back to mnemonic (e.g., "MOV", "ADD")
-            opcode_str = "UNKNOWN"
-            ew_bits = opcode_binary[0:2]
-            category_code_bin = opcode_binary[2:7] # This is now 5 bits
-
-            # Convert category_code_bin to an integer to find its index in the operations list
-            category_index = int(category_code_bin, 2)
-            
-            # Find the group based on ew_bits
-            opcode_group_index = -1
-            for i, ew in enumerate(operationCodes_EW):
-                if ew == ew_bits:
-                    opcode_group_index = i
-                    break
-            
-            if opcode_group_index != -1:
-                # Get the operations list for this group
-                group_operations = operations[opcode_group_index]
-                if category_index < len(group_operations):
-                    opcode_str = group_operations[category_index]
-            
-            if opcode_str == "UNKNOWN":
-                print(f"ERROR: Unknown opcode encountered: {opcode_binary} at PC: {current_pc}")
+            # Decode into the mnemonic (e.g., "MOV", "ADD") and operand fields
+            decoded = Instruction.decode(instruction_int)
+
+            if decoded[0] == "UNKNOWN":
+                print(f"ERROR: Unknown opcode encountered: {format(instruction_int, f'0{Length.instrxn}b')[0:Length.opCode]} at {Program.where(current_pc)}")
                 break # Halt on unknown opcode
 
             # Increment PC for next instruction BEFORE execution,
@@ -367,7 +471,7 @@ class Program:
             Access.store('register', 'PC', current_pc + 1)
 
             # Execute the instruction
-            self.execute(opcode_str, op1_addr_binary, op1_mode_binary, op2_addr_binary, op2_mode_binary)
+            self.execute(*decoded)
 
             # EOP will call sys.exit(), so no need for explicit break here.
             # JMP/CALL/RET modify PC directly, so the next loop iteration will fetch from the new PC.
@@ -375,10 +479,186 @@ class Program:
         print("Program execution completed.")
 
 
+    def compileVerified(self):
+        """
+        Turns each instruction of the verified table into a closure with its operands resolved
+        ahead of time, so running it skips getOp's mode chain, the unknown-mode error and the
+        JMP/CALL target type checks that verify() already ruled out. The closures read and write
+        operands in the same order as execute(). Opcodes outside the hot path (SCAN, MOD,
+        conditional jumps, and CALL while memoizing) still go through execute().
+        Returns {pc: (instruction_int, closure)}.
+        """
+        load_memory, store_memory = Program.loadMemory, Program.storeMemory
+        pc_address, tsp_address, spr_address = variable['PC'], variable['TSP'], variable['SPR']
+        register_mode, immediate_mode = AddressingMode.register(None), AddressingMode.immediate(None)
+        direct_mode, indirect_mode = AddressingMode.direct(None), AddressingMode.indirect(None)
+        autoinc_mode, indexed_mode = AddressingMode.autoinc(None), AddressingMode.indexed(None)
+
+        def reader(addr, mode):
+            if mode == register_mode:
+                return lambda: register.load(addr)
+            if mode == immediate_mode:
+                return lambda: addr
+            if mode == direct_mode:
+                return lambda: load_memory(addr)
+            if mode == autoinc_mode: # *R# as a source: read through the register, then increment it
+                def read():
+                    pointer = register.load(addr)
+                    register.store(addr, pointer + 1)
+                    return load_memory(pointer)
+                return read
+            if mode == indirect_mode:
+                return lambda: load_memory(load_memory(addr, ("mem", "reg")))
+            return lambda: load_memory(register.load(addr)) # A#
+
+        def writer(addr, mode):
+            # Destinations are resolved when written, as write() calls getOp again
+            if mode == register_mode:
+                return lambda value: register.store(addr, value)
+            if mode == direct_mode:
+                return lambda value: store_memory(addr, value)
+            if mode == indirect_mode:
+                return lambda value: store_memory(load_memory(addr, ("mem", "reg")), value)
+            return lambda value: store_memory(register.load(addr), value) # *R# (no increment) and A#
+
+        def prepare(decoded):
+            opcode_str = decoded[0]
+            op1, mode1, op2, mode2 = int(decoded[1], 2), decoded[2], int(decoded[3], 2), decoded[4]
+            if mode1 == autoinc_mode and mode2 == indexed_mode and op1 == op2:
+                opcode_str = None # Operand 2's address would see operand 1's increment; keep execute()'s order
+
+            if opcode_str in ("ADD", "SUB", "MUL", "DIV"):
+                read1, read2, write1 = reader(op1, mode1), reader(op2, mode2), writer(op1, mode1)
+                if opcode_str == "ADD":
+                    return lambda: write1(read1() + read2())
+                if opcode_str == "SUB":
+                    return lambda: write1(read1() - read2())
+                if opcode_str == "MUL":
+                    return lambda: write1(read1() * read2())
+                def divide():
+                    val1, val2 = read1(), read2()
+                    if val2 == 0:
+                        Program.exception(division_by_zero_exception)
+                    write1(val1 // val2)
+                return divide
+
+            if opcode_str == "MOV":
+                read1, write2 = reader(op1, mode1), writer(op2, mode2)
+                return lambda: write2(read1())
+
+            if opcode_str == "PRNT":
+                read1 = reader(op1, mode1)
+                return lambda: print(f"PRNT: {read1()}")
+
+            if opcode_str == "PUSH":
+                read1 = reader(op1, mode1)
+                def push():
+                    value = read1()
+                    top = register.load(tsp_address) + 1
+                    register.store(tsp_address, top)
+                    store_memory(top, value)
+                return push
+
+            if opcode_str == "POP":
+                write1 = writer(op1, mode1)
+                def pop():
+                    top = register.load(tsp_address)
+                    if top < register.load(spr_address):
+                        raise IndexError("Stack Underflow: Attempted to pop from an empty stack.")
+                    value = load_memory(top)
+                    register.store(tsp_address, top - 1)
+                    write1(value)
+                return pop
+
+            if opcode_str == "JMP":
+                return lambda: register.store(pc_address, op1)
+
+            if opcode_str == "CALL":
+                def call():
+                    if self.memo is not None: # Replay and recording live in execute()
+                        return self.execute(*decoded)
+                    return_address = register.load(pc_address)
+                    top = register.load(tsp_address) + 1
+                    register.store(tsp_address, top)
+                    store_memory(top, return_address)
+                    register.store(pc_address, op1)
+                return call
+
+            if opcode_str == "RET":
+                def ret():
+                    top = register.load(tsp_address)
+                    if top < register.load(spr_address):
+                        raise IndexError("Stack Underflow: Attempted to return from an empty stack (no CALL).")
+                    return_address = load_memory(top)
+                    register.store(tsp_address, top - 1)
+                    register.store(pc_address, return_address)
+                return ret
+
+            return lambda: self.execute(*decoded)
+
+        words = {pc: instruction_int for pc, _, instruction_int in self.encoded}
+        return {pc: (words[pc], prepare(decoded)) for pc, decoded in self.verified.items()}
+
+
+    def runVerified(self):
+        """
+        Loop for programs accepted by verify(): runs the closures from compileVerified() without
+        fetching or decoding. An instruction whose word was overwritten since verify() (a store
+        into the code through a register or pointer), or a PC outside the verified code (e.g. a
+        RET to a pushed value), goes through step() instead, so the run matches run().
+        A subclass that overrides execute(), getOp() or write() (e.g. fixedpoint.FixedPointProgram)
+        runs every instruction through step(), since the closures copy Program's own semantics.
+        """
+        cls = type(self)
+        if cls.execute is not Program.execute or cls.getOp is not Program.getOp or cls.write is not Program.write:
+            while self.step() is not None:
+                pass
+            return
+        compiled = self.compiled
+        code = memory.data
+        pc_address = variable['PC']
+        while True:
+            current_pc = register.load(pc_address)
+            entry = compiled.get(current_pc)
+            if entry is None or code.get(current_pc) != entry[0]:
+                if self.step() is None:
+                    break
+                continue
+            register.store(pc_address, current_pc + 1)
+            entry[1]()
+
+
+    def runMonitored(self, monitors):
+        """
+        Same loop as run(), but notifies each monitor around every instruction.
+        A monitor provides start(), enter(pc, instruction_int, opcode_str), leave() and stop();
+        stop() is also called when EOP or an exception ends the program through sys.exit().
+        """
+        for monitor in monitors:
+            monitor.start()
+        try:
+            while True:
+                current_pc = Access.data('PC', flow=["reg"])
+                instruction_int = Access.data(current_pc, flow=["mem"], is_code=True)
+                decoded = Instruction.decode(instruction_int)
+
+                if decoded[0] == "UNKNOWN":
+                    print(f"ERROR: Unknown opcode encountered: {format(instruction_int, f'0{Length.instrxn}b')[0:Length.opCode]} at {Program.where(current_pc)}")
+                    break
+
+                Access.store('register', 'PC', current_pc + 1)
+                for monitor in monitors:
+                    monitor.enter(current_pc, instruction_int, decoded[0])
+                self.execute(*decoded)
+                for monitor in monitors:
+                    monitor.leave()
+        finally:
+            for monitor in reversed(monitors): # Undo storage hooks in the reverse order they were installed
+                monitor.stop()
+
+
 # Main execution block
 if __name__ == "__main__":
-    division_by_zero_exception = Except("Attempted division by zero.")
-
     test_program_filename = "test_program.isa" # Change this to your group's shortcut extension
     """"
     sample_program_lines = [
@@ -461,7 +741,7 @@ if __name__ == "__main__":
         print("\nRunning program from test_program.isa...\n")
         
         # Program constructor now handles compilation
-        program_instance = Program(program_from_file)
+        program_instance = Program(program_from_file, source_name=test_program_filename)
         program_instance.run() # This calls the actual run method
 
     except Exception as e:
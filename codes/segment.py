@@ -0,0 +1,124 @@
+# segment.py
+
+import mmap
+from collections.abc import MutableMapping
+
+from storage import memory
+from convert import Precision
+
+class Segment:
+    """
+    A binary data file mapped into a Storage address range with mmap.
+    The file is read as packed native-endian words: dtype 'i' (32-bit ints) or 'f' (32-bit floats).
+    With write_through the mapping is shared and stores land in the file; otherwise stores go to
+    private copy-on-write pages and the file is left untouched.
+    """
+    def __init__(self, path, base, dtype='i', write_through=False):
+        if dtype not in ('i', 'f'):
+            raise ValueError(f"Unsupported segment dtype: {dtype}. Must be 'i' or 'f'.")
+        self.path = path
+        self.base = base
+        self.dtype = dtype
+        self.write_through = write_through
+        self.file = open(path, 'r+b' if write_through else 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_WRITE if write_through else mmap.ACCESS_COPY)
+        except ValueError:
+            self.file.close()
+            raise ValueError(f"Cannot map empty data file: {path}")
+        view = memoryview(self.map)
+        self.words = view[:len(view) - len(view) % 4].cast(dtype) # Ignore a trailing partial word
+        self.end = base + len(self.words)
+
+    def read(self, address):
+        return self.words[address - self.base]
+
+    def write(self, address, value):
+        # Storage.store hands over ints, or floats already converted to spbin strings.
+        if isinstance(value, str):
+            value = Precision.spbin2dec(value)
+        if self.dtype == 'i':
+            value = round(value)
+            if not (-2**31 <= value < 2**31):
+                raise ValueError(f"Value {value} does not fit the 32-bit segment {self.path} at address {address}")
+        else:
+            value = float(value)
+        self.words[address - self.base] = value
+
+    def close(self):
+        if self.write_through:
+            self.map.flush()
+        self.words.release()
+        self.map.close()
+        self.file.close()
+
+class SegmentedData(MutableMapping):
+    """
+    Storage.data wrapper that serves the address ranges of attached segments from their files
+    and everything else from the original mapping. Only installed while segments are attached.
+    """
+    def __init__(self, data):
+        self.data = data
+        self.segments = []
+
+    def find(self, address):
+        for segment in self.segments:
+            if segment.base <= address < segment.end:
+                return segment
+        return None
+
+    def __getitem__(self, address):
+        segment = self.find(address)
+        if segment is None:
+            return self.data[address]
+        return segment.read(address)
+
+    def __setitem__(self, address, value):
+        segment = self.find(address)
+        if segment is None:
+            self.data[address] = value
+        else:
+            segment.write(address, value)
+
+    def __delitem__(self, address):
+        segment = self.find(address)
+        if segment is None:
+            del self.data[address]
+        else:
+            segment.write(address, 0)
+
+    def __contains__(self, address):
+        return address in self.data or (isinstance(address, int) and self.find(address) is not None)
+
+    def __iter__(self):
+        for address in self.data:
+            if self.find(address) is None:
+                yield address
+        for segment in self.segments:
+            yield from range(segment.base, segment.end)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+def attach(path, base, dtype='i', write_through=False, storage=memory):
+    """
+    Maps the data file at 'path' into 'storage' starting at address 'base' and returns the Segment.
+    Loads from the range (direct, indirect or indexed) read the file directly.
+    """
+    segment = Segment(path, base, dtype, write_through)
+    if not isinstance(storage.data, SegmentedData):
+        storage.data = SegmentedData(storage.data)
+    for other in storage.data.segments:
+        if segment.base < other.end and other.base < segment.end:
+            segment.close()
+            raise ValueError(f"Segment {path} at {base}..{segment.end - 1} overlaps {other.path} at {other.base}..{other.end - 1}")
+    storage.data.segments.append(segment)
+    storage.max_size = max(storage.max_size, segment.end)
+    return segment
+
+def detach(segment, storage=memory):
+    """Unmaps 'segment'; the storage drops its wrapper once no segment is left."""
+    storage.data.segments.remove(segment)
+    segment.close()
+    if not storage.data.segments:
+        storage.data = storage.data.data
@@ -0,0 +1,157 @@
+# server.py
+"""
+Resident compile-and-run server on a Unix domain socket.
+
+Each request is one JSON line: {"source": [lines] or "text", "image": [[pc, word], ...], "input": [...]}
+("source" or "image" is required, "input" feeds SCAN). Each response is one JSON line:
+{"output": str, "exit": int or null, "error": str or null, "registers": {addr: value}, "memory": {addr: value}}
+where "memory" lists only the non-zero words. A job still running after the server's time limit
+is stopped and answered with a TimeoutError in "error".
+
+Usage:
+    python server.py serve --socket /tmp/isa.sock [--workers N] [--timeout SECONDS]
+    python server.py submit --socket /tmp/isa.sock program.isa [--input 5 7]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import socketserver
+import sys
+
+# Set in each worker process by warmWorker().
+pristine = None
+default_timeout = 10.0 # Seconds a job may run before it fails
+
+def warmWorker():
+    """Pool initializer: imports the VM once and captures its pristine post-import state."""
+    global pristine
+    from snapshot import Snapshot
+    import run # Imported for its side effects: the whole VM is loaded before the first job
+    pristine = Snapshot()
+
+def expire(signum, frame):
+    raise TimeoutError("job exceeded the time limit")
+
+def runJob(request, timeout=default_timeout):
+    """
+    Runs one request inside a warm worker and resets the VM afterwards. A program still running
+    after 'timeout' seconds is interrupted (SIGALRM, so it must run in the worker's main thread).
+    """
+    from run import Program
+    from storage import register, memory
+
+    output = io.StringIO()
+    source = request.get("source")
+    if isinstance(source, str):
+        source = source.splitlines()
+    inputs = "".join(f"{value}\n" for value in request.get("input", []))
+    result = {"exit": None, "error": None}
+
+    stdin = sys.stdin
+    sys.stdin = io.StringIO(inputs)
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        with contextlib.redirect_stdout(output):
+            if source is not None:
+                program = Program([line.strip() for line in source])
+            else:
+                program = Program.fromImage(request["image"])
+            program.run()
+    except SystemExit as e: # EOP and Program.exception leave through sys.exit()
+        result["exit"] = e.code
+    except EOFError:
+        result["error"] = "SCAN input exhausted"
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+        sys.stdin = stdin
+        result["output"] = output.getvalue()
+        result["registers"] = {str(k): v for k, v in register.data.items()}
+        result["memory"] = {str(k): v for k, v in memory.data.items() if v != 0}
+        pristine.restore()
+    return result
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if "source" not in request and "image" not in request:
+                    raise ValueError("request needs 'source' or 'image'")
+                response = self.server.pool.apply(runJob, (request, self.server.job_timeout))
+            except Exception as e:
+                response = {"output": "", "exit": None, "error": f"{type(e).__name__}: {e}",
+                            "registers": {}, "memory": {}}
+            self.wfile.write((json.dumps(response) + "\n").encode())
+            self.wfile.flush()
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, workers, timeout=default_timeout):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, Handler)
+        self.job_timeout = timeout
+        self.pool = multiprocessing.Pool(workers, initializer=warmWorker)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.terminate()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+def submit(socket_path, source=None, image=None, inputs=()):
+    """Client helper: sends one job and returns the decoded response."""
+    request = {"input": list(inputs)}
+    if source is not None:
+        request["source"] = source
+    else:
+        request["image"] = image
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall((json.dumps(request) + "\n").encode())
+        with client.makefile('rb') as reply:
+            return json.loads(reply.readline())
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident ISA compile-and-run server.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve")
+    serve.add_argument("--socket", required=True)
+    serve.add_argument("--workers", type=int, default=os.cpu_count())
+    serve.add_argument("--timeout", type=float, default=default_timeout, help="seconds a job may run")
+    send = commands.add_parser("submit")
+    send.add_argument("--socket", required=True)
+    send.add_argument("program")
+    send.add_argument("--input", nargs="*", default=[])
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        with Server(args.socket, args.workers, args.timeout) as server:
+            print(f"Listening on {args.socket} with {args.workers} workers")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+    else:
+        with open(args.program) as f:
+            response = submit(args.socket, source=f.read(), inputs=args.input)
+        print(response["output"], end="")
+        if response["error"]:
+            print(f"ERROR: {response['error']}")
+        sys.exit(response["exit"] or 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# snapshot.py
+
+from storage import register, memory, variable, page_bits
+from convert import Length
+
+class Snapshot:
+    """
+    Captures the full VM state (registers, memory, the 'variable' symbol table with its source
+    map, and the instruction layout) and restores it. While a snapshot is active, stores and
+    setStorage calls are tracked per page (2**page_bits words), so restore() only rewrites the
+    pages touched since the capture or the previous restore.
+    """
+    def __init__(self):
+        self.variable = dict(variable)
+        self.source = dict(variable.source)
+        self.op_addr = Length.opAddr
+        self.containers = {storage: (storage.data, storage.max_size) for storage in (register, memory)}
+        self.pages = {}
+        self.dirty = {}
+        self._hooks = [] # (storage, hook handle) for release()
+        for storage in (register, memory):
+            pages = {}
+            for addr, value in storage.data.items():
+                pages.setdefault(addr >> page_bits, {})[addr] = value
+            self.pages[storage] = pages
+            self.dirty[storage] = set()
+            self._track(storage)
+
+    def _track(self, storage):
+        """Wraps storage.store and storage.setStorage so every written address marks its page dirty."""
+        dirty = self.dirty[storage]
+
+        def trackStores(store):
+            def tracking_store(address, value):
+                store(address, value)
+                if not isinstance(address, int):
+                    try:
+                        address = int(address)
+                    except ValueError:
+                        address = int(address, 2) # Same '0b' spelling Storage.store accepts
+                dirty.add(address >> page_bits)
+            return tracking_store
+
+        def trackSizes(set_storage):
+            def tracking_setStorage(stolen):
+                set_storage(stolen) # Fills slots below 'stolen' with a bulk update, not through store()
+                if stolen > 0:
+                    dirty.update(range(((stolen - 1) >> page_bits) + 1))
+            return tracking_setStorage
+
+        self._hooks.append((storage, storage.hook('store', trackStores)))
+        self._hooks.append((storage, storage.hook('setStorage', trackSizes)))
+
+    def restore(self):
+        """
+        Puts back the layout, every dirty page, the symbol table and the source map.
+        Returns the number of pages restored.
+        """
+        if Length.opAddr != self.op_addr:
+            Length.setOpAddr(self.op_addr)
+        for storage, (data, max_size) in self.containers.items():
+            storage.data, storage.max_size = data, max_size # setAddressSpace swaps in paged memory
+        restored = 0
+        size = 1 << page_bits
+        for storage, dirty in self.dirty.items():
+            data = storage.data
+            pages = self.pages[storage]
+            for page in dirty:
+                saved = pages.get(page, {})
+                for addr in range(page << page_bits, (page << page_bits) + size):
+                    if addr in saved:
+                        data[addr] = saved[addr]
+                    else:
+                        data.pop(addr, None)
+            restored += len(dirty)
+            dirty.clear()
+        if variable != self.variable:
+            variable.clear()
+            variable.update(self.variable)
+        variable.source.clear()
+        variable.source.update(self.source)
+        return restored
+
+    def release(self):
+        """Stops dirty tracking. The snapshot can no longer be restored afterwards."""
+        for storage, handle in self._hooks:
+            storage.unhook(handle)
+        self._hooks = []
+        self.dirty = {}
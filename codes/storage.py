@@ -1,11 +1,15 @@
 # storage.py
 
 from convert import Precision, Length
-import copy
+from symbols import SymbolTable
+
+page_bits = 5 # A page holds 2**page_bits words; the unit tracked by snapshots and paged memory
 
 class Storage:
     def __init__(self, data={}):
-        self.data = copy.deepcopy(data)
+        self.data = dict(data) # Stored values are immutable (int/str), so a shallow copy is enough
+        self.max_size = 0 # Highest slot count requested through setStorage
+        self.hooks = {} # Method name -> [(name, wrapper)] installed through hook(), oldest first
 
     def load(self, address, isCode=False):
         # Ensure address is an integer for lookup.
@@ -53,9 +57,42 @@ class Storage:
 
     def setStorage(self, stolen):
         # This method ensures all slots up to 'stolen' are initialized.
-        for i in range(stolen):
-            if i not in self.data:
-                self.store(i, 0) # Initialize with an integer 0
+        self.max_size = max(self.max_size, stolen)
+        if type(self.data) is not dict:
+            return # Paged/segmented storage allocates on first touch instead
+        self.data.update((i, 0) for i in range(stolen) if i not in self.data) # Initialize with an integer 0
+
+    def hook(self, name, wrapper):
+        """
+        Replaces this instance's 'name' method (load, store or setStorage) with wrapper(inner),
+        where inner is the method as wrapped by the hooks installed before. Returns a handle
+        for unhook(). Hooks can be removed in any order; the remaining ones are applied again
+        over the class method, so wrapper must only build and return the replacement.
+        """
+        handle = (name, wrapper)
+        self.hooks.setdefault(name, []).append(handle)
+        self._applyHooks(name)
+        return handle
+
+    def unhook(self, handle):
+        name = handle[0]
+        self.hooks[name] = [installed for installed in self.hooks[name] if installed is not handle]
+        self._applyHooks(name)
+
+    def _applyHooks(self, name):
+        method = getattr(type(self), name).__get__(self)
+        for _, wrapper in self.hooks[name]:
+            method = wrapper(method)
+        if self.hooks[name]:
+            setattr(self, name, method)
+        else:
+            self.__dict__.pop(name, None) # Back to the plain class method
+
+    def usePages(self):
+        # Moves the current contents into sparse pages (see paged.PagedData).
+        from paged import PagedData # Only needed for wide address spaces; keeps startup imports small
+        if not isinstance(self.data, PagedData):
+            self.data = PagedData(self.data)
 
     def dispStorage(self):
         for k, v in self.data.items():
@@ -79,15 +116,14 @@ class Storage:
         except Exception as e:
             print(f"Error displaying slot {key}: {e}")
 
-# --- Global instances and Initialization (Outside the Storage class) ---
+# --- Default machine layout (Outside the Storage class) ---
+
 memory = Storage()
 register = Storage()
 
 # List of specialized register names
 register_list = ["BR","DR1","DR2","FR","IR","PC","SPR","TSP","CPR","NCP","BPR","NBP","VPR","NVP","MPR","NMP"]
 
-variable = {} # The global 'variable' dictionary maps symbolic names to their numeric addresses.
-
 # Define base addresses for specialized registers and memory sections
 br = 8
 mspr = 112
@@ -99,7 +135,24 @@ mmpr = 216
 # Initial values for specialized registers
 memory_list = [br,0,0,0,br,br,mspr,mspr,mcpr,mcpr,mbpr,mbpr,mvpr,mvpr,mmpr,mmpr]
 
-# Initialize specialized registers (BR, DR1, ..., NMP)
+varpr = 1 # Base address for GPRs (R1 to R7) and Memory Variables (M1 to M7)
+var_reglen = 7
+apr = 24 # Base address for Array Pointers (A1 to A4), assumed to be in registers
+array_reglen = 4
+index_reglen = 2 # Index Registers (I1 to I2) continue addressing from A#
+
+# Namespace of every built-in name; names defined later (DEF/DEB) are program labels.
+symbol_namespaces = {
+    **dict.fromkeys(register_list, "register"),
+    **{f"R{i+1}": "register" for i in range(var_reglen)},
+    **{f"M{i+1}": "memory" for i in range(var_reglen)},
+    **{f"A{i+1}": "register" for i in range(array_reglen)},
+    **{f"I{i+1}": "register" for i in range(index_reglen)},
+}
+
+# The global 'variable' table maps symbolic names to their numeric addresses (see symbols.SymbolTable).
+variable = SymbolTable(builtin=symbol_namespaces)
+
 for i in range(len(register_list)):
     reg_name = register_list[i]
     reg_address = br + i
@@ -107,44 +160,43 @@ for i in range(len(register_list)):
     variable[reg_name] = reg_address
     register.store(reg_address, reg_initial_value)
 
-# Initialize General Purpose Registers (R1 to R7)
-varpr = 1 # Base address for GPRs
-var_reglen = 7
 for i in range(var_reglen):
     reg_name = f"R{i+1}"
     reg_address = varpr + i
     variable[reg_name] = reg_address
     register.store(reg_address, 0)
 
-# Initialize Memory Variables (M1 to M7) - assuming these are distinct memory addresses
 for i in range(var_reglen):
     mem_name = f"M{i+1}"
-    mem_address = varpr + i # Adjust if memory variables have different address space
+    mem_address = varpr + i # Memory addresses, not registers
     variable[mem_name] = mem_address
     memory.store(mem_address, 0)
 
-# Initialize Array Pointers (A1 to A4)
-apr = 24 # Base address for Array Pointers, assumed to be in registers
-array_reglen = 4
 for i in range(array_reglen):
     array_name = f"A{i+1}"
     array_address = apr + i
     variable[array_name] = array_address
     register.store(array_address, 0)
 
-# Initialize Index Registers (I1 to I2)
-index_reglen = 2
 for i in range(index_reglen):
     index_name = f"I{i+1}"
     index_address = apr + array_reglen + i # Continue addressing from A#
     variable[index_name] = index_address
     register.store(index_address, 0)
 
-# Set initial storage sizes and ensure all slots are initialized to 0
 reg_len = 32
 register.setStorage(reg_len)
 mem_len = 256
 memory.setStorage(mem_len)
 
 # This list is used by display functions (e.g., in run.py's main block)
-data = [variable, register, memory]
\ No newline at end of file
+data = [variable, register, memory]
+
+def setAddressSpace(addr_bits):
+    """
+    Widens the operand address fields to 'addr_bits' (see Length.setOpAddr) and switches memory
+    to sparse pages covering 2**addr_bits words. Call before compiling a program.
+    """
+    Length.setOpAddr(addr_bits)
+    memory.usePages()
+    memory.max_size = 2**addr_bits
\ No newline at end of file
@@ -0,0 +1,133 @@
+# symbols.py
+
+import sys
+
+namespaces = ("register", "memory", "label")
+
+class SymbolTable(dict):
+    """
+    The 'variable' table: a dict of name -> address that also keeps, as names are added and
+    removed, the namespace of every name (register, memory or label), an interned id per name,
+    an address -> names reverse index per namespace and a source map from PC to (file, line).
+    Plain dict lookups stay O(1); the extra indexes make the reverse lookups O(1) as well.
+
+    builtin: {name: namespace} for the machine's register and memory names (see storage);
+    every other name is a program label.
+    """
+    def __init__(self, data=(), builtin=None):
+        super().__init__()
+        self.builtin = dict(builtin or {})
+        self.ids = {} # name -> interned id; ids are never reused, so they stay valid across clear()
+        self.names = [] # id -> name
+        self.addresses = {namespace: {} for namespace in namespaces} # address -> [ids], in definition order
+        self.source = {} # pc -> (file, line) of the loaded code
+        self.update(data)
+
+    # --- Names and ids ---
+
+    def namespace(self, name):
+        """Namespace a name belongs to; decided by the builtin table, not by its spelling."""
+        return self.builtin.get(name, "label")
+
+    def intern(self, name):
+        """Returns the id of 'name', assigning the next one on first use."""
+        symbol_id = self.ids.get(name)
+        if symbol_id is None:
+            name = sys.intern(name)
+            symbol_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return symbol_id
+
+    def define(self, name, address):
+        """Defines a program label. Raises ValueError if the name belongs to a register or memory name."""
+        if name in self.builtin:
+            raise ValueError(f"Label '{name}' would shadow the {self.builtin[name]} name '{name}'")
+        self[name] = address
+
+    # --- Reverse index ---
+
+    def symbol(self, address, namespace="label"):
+        """
+        First name defined for 'address' in a namespace, or None. For "memory", program labels
+        are preferred over M# names.
+        """
+        if namespace == "memory":
+            ids = self.addresses["label"].get(address) or self.addresses["memory"].get(address)
+        else:
+            ids = self.addresses[namespace].get(address)
+        return self.names[ids[0]] if ids else None
+
+    def symbols(self, namespace="label"):
+        """{address: first name} for one namespace."""
+        return {address: self.names[ids[0]] for address, ids in self.addresses[namespace].items()}
+
+    def symbolize(self, address, namespace="label"):
+        """Name of an address if it has one, else the address itself, e.g. for messages."""
+        name = self.symbol(address, namespace)
+        return str(address) if name is None else name
+
+    # --- Source map ---
+
+    def locate(self, pc):
+        """Source location of a code address, e.g. "test_program.isa:4" or "line 4", or None."""
+        location = self.source.get(pc)
+        if location is None:
+            return None
+        file, line = location
+        return f"line {line}" if file is None else f"{file}:{line}"
+
+    # --- dict interface, keeping the indexes in step ---
+
+    def _index(self, name, address):
+        self.addresses[self.namespace(name)].setdefault(address, []).append(self.intern(name))
+
+    def _unindex(self, name):
+        address = dict.__getitem__(self, name)
+        index = self.addresses[self.namespace(name)]
+        ids = index.get(address)
+        if ids is not None:
+            ids.remove(self.ids[name])
+            if not ids:
+                del index[address]
+
+    def __setitem__(self, name, address):
+        if name in self:
+            if dict.__getitem__(self, name) == address:
+                return
+            self._unindex(name)
+        dict.__setitem__(self, name, address)
+        self._index(name, address)
+
+    def __delitem__(self, name):
+        if name in self:
+            self._unindex(name)
+        dict.__delitem__(self, name)
+
+    def pop(self, name, *default):
+        if name in self:
+            self._unindex(name)
+        return dict.pop(self, name, *default)
+
+    def popitem(self):
+        if not self:
+            raise KeyError("popitem(): symbol table is empty")
+        name = next(reversed(self))
+        return name, self.pop(name)
+
+    def setdefault(self, name, address=None):
+        if name not in self:
+            self[name] = address
+        return dict.__getitem__(self, name)
+
+    def update(self, *args, **kwargs):
+        for name, address in dict(*args, **kwargs).items():
+            self[name] = address
+
+    def clear(self):
+        dict.clear(self)
+        for index in self.addresses.values():
+            index.clear()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
@@ -0,0 +1,44 @@
+# test_compiler.py
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from storage import register, variable
+from run import Program
+from compiler import Instruction
+from addressing import AddressingMode
+
+def run(program):
+    """Runs a loaded program until it exits; returns the exit code."""
+    with pytest.raises(SystemExit) as exit_info:
+        program.run()
+    return exit_info.value.code
+
+@pytest.mark.parametrize("verbose", [True, False])
+def test_inlining_reports_only_when_verbose(capsys, verbose):
+    program = Program(["MOV #2, R1", "CALL INC", "PRNT R1", "EOP", "DEF INC", "ADD R1, #1", "RET"],
+                      inline_limit=4, verbose=verbose)
+    assert ("Inlined INC" in capsys.readouterr().out) == verbose
+    assert run(program) == 0
+    assert register.load(variable['R1']) == 3
+
+def test_importing_the_vm_does_not_load_re():
+    check = "import sys, run; print('re' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+    assert result.stdout.strip() == "False"
+
+@pytest.mark.parametrize("operand, mode", [
+    ("R1", AddressingMode.register(None)), ("*R1", AddressingMode.register_indirect(None)),
+    ("#5", AddressingMode.immediate(None)), ("[R1]", AddressingMode.indirect(None)),
+    ("A1", AddressingMode.indexed(None)), ("M1", AddressingMode.direct(None)),
+])
+def test_operands_parse_to_their_modes(operand, mode):
+    assert Instruction.getAddressingMode(operand) == mode
+
+def test_encode_names_the_column_of_a_bad_operand():
+    with pytest.raises(ValueError, match="column"):
+        Instruction.encode("MOV #5, NOWHERE", line_number=3)
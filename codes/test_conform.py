@@ -0,0 +1,46 @@
+# test_conform.py
+
+import random
+
+import pytest
+
+import conform
+from run import Program
+
+@pytest.fixture(autouse=True)
+def fresh_pristine(monkeypatch):
+    """Gives each test its own conform.pristine snapshot and releases its hooks afterwards."""
+    monkeypatch.setattr(conform, "pristine", None)
+    yield
+    if conform.pristine is not None:
+        conform.pristine.release()
+
+def test_every_routine_is_called_twice_with_the_same_registers():
+    lines, _ = conform.randomProgram(random.Random(0), routines=3)
+    main = lines[:lines.index("EOP")]
+    for level in range(1, 4):
+        calls = [i for i, line in enumerate(main) if line == f"CALL F{level}"]
+        assert len(calls) >= 2
+        assert main[calls[-2] - 6:calls[-2]] == main[calls[-1] - 6:calls[-1]] # Same MOVs before both
+
+def test_memoized_engine_replays_cached_calls(monkeypatch):
+    memos = []
+    memoize = Program.memoize
+    def recordingMemoize(self, *args, **kwargs):
+        memos.append(memoize(self, *args, **kwargs))
+        return memos[-1]
+    monkeypatch.setattr(Program, "memoize", recordingMemoize)
+    compared, found = conform.check(conform.memoized, count=40)
+    assert found is None
+    assert compared == 40
+    assert sum(memo.hits for memo in memos) > 0
+
+def test_mismatch_is_found_and_shrunk():
+    def broken(lines):
+        Program([line.replace("ADD", "SUB") for line in lines]).run()
+    _, found = conform.check(broken, count=20)
+    assert found is not None
+    lines, _, fields, _, _ = found
+    assert any(line.startswith("ADD") for line in lines)
+    assert len(lines) < 20
+    assert fields
@@ -0,0 +1,35 @@
+# test_cover.py
+
+import pytest
+
+from run import Program
+from cover import Coverage
+
+source = ["MOV #1, R1", "JEQ R1, #1", "JMP SKIP", "PRNT R1", "DEF SKIP", "EOP"]
+
+def covered(lines):
+    program = Program(lines, verbose=False)
+    coverage = Coverage()
+    with pytest.raises(SystemExit):
+        program.run(coverage=coverage)
+    return coverage
+
+def test_lines_and_branch_directions():
+    coverage = covered(source)
+    assert Coverage.lineMap() == {0: 1, 1: 2, 2: 3, 3: 4, 4: 6}
+    assert coverage.lines() == {1: (True, False, False), 2: (True, False, True), 3: (True, False, False),
+                                4: (False, False, False), 6: (True, False, False)}
+    report = coverage.report(source).splitlines()
+    assert report[1] == "    2 +    JEQ R1, #1  [taken: no, fallthrough: yes]"
+    assert report[3] == "    4 -    PRNT R1"
+    assert report[4] == "    5      DEF SKIP"
+    assert report[-2:] == ["Lines: 4/5 executed", "Branches: 1/2 directions taken"]
+
+def test_merge_and_file_round_trip(tmp_path):
+    first = covered(source)
+    second = covered(["MOV #1, R1", "JEQ R1, #1", "PRNT R1", "PRNT R1", "EOP"])
+    first.save(str(tmp_path / "run.cov"))
+    merged = Coverage.load(str(tmp_path / "run.cov")).merge(second)
+    assert [Coverage.isSet(merged.executed, pc) for pc in range(6)] == [True] * 5 + [False]
+    with pytest.raises(ValueError, match="Cannot merge"):
+        merged.merge(Coverage(8))
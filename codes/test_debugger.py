@@ -0,0 +1,48 @@
+# test_debugger.py
+
+import pytest
+
+from storage import memory, register, variable
+from run import Program
+from debugger import Debugger, DebuggerShell
+
+lines = ["MOV #1, R1", "MOV #2, R2", "MOV R2, M7", "CALL F", "EOP", "DEF F", "ADD R1, #5", "RET"]
+
+def test_breakpoint_on_a_label_then_exit():
+    debugger = Debugger(Program(lines, verbose=False))
+    debugger.addBreakpoint("F")
+    assert debugger.cont() == "break"
+    assert debugger.pc() == variable['F']
+    assert register.load(variable['R1']) == 1
+    debugger.removeBreakpoint("F")
+    assert debugger.cont() == "exit"
+    assert debugger.exit_code == 0
+    assert register.load(variable['R1']) == 6
+
+def test_watchpoints_report_old_and_new_values():
+    debugger = Debugger(Program(lines, verbose=False))
+    installed = list(memory.hooks['store'])
+    debugger.addWatchpoint("M7")
+    debugger.addWatchpoint("R1")
+    assert debugger.cont() == "watch"
+    assert debugger.hits == [('register', variable['R1'], 0, 1)]
+    assert debugger.cont() == "watch"
+    assert debugger.hits == [('memory', variable['M7'], 0, 2)]
+    assert memory.hooks['store'] == installed # Hooks are only installed while running
+
+def test_step_runs_one_instruction():
+    debugger = Debugger(Program(lines, verbose=False))
+    assert debugger.step() == "step"
+    assert debugger.pc() == 1
+
+@pytest.mark.parametrize("command, usage", [("watch", "Usage: watch ADDR|NAME [register|memory]"),
+                                            ("print", "Usage: print ADDR|NAME [register|memory]"),
+                                            ("watch R1 disk", "Usage: watch ADDR|NAME [register|memory]"),
+                                            ("unwatch", "Usage: unwatch ADDR|NAME [register|memory]"),
+                                            ("break", "Usage: break PC|LABEL"),
+                                            ("watch NOPE", "Unknown name: NOPE")])
+def test_shell_reports_bad_arguments(capsys, command, usage):
+    shell = DebuggerShell(Debugger(Program(lines, verbose=False)))
+    capsys.readouterr()
+    assert not shell.onecmd(command)
+    assert capsys.readouterr().out.strip() == usage
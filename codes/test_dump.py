@@ -0,0 +1,29 @@
+# test_dump.py
+
+import os
+
+import pytest
+
+import dump
+from storage import memory, setAddressSpace
+from run import Program
+
+def test_wide_address_space_dumps_only_populated_pages(tmp_path):
+    setAddressSpace(24)
+    program = Program(["MOV #5, R1", "EOP"], verbose=False)
+    with pytest.raises(SystemExit):
+        program.run()
+    path = str(tmp_path / "state.bin")
+    dump.dump(path)
+    assert os.path.getsize(path) < 4096
+    word_bytes, registers, words = dump.read(path)
+    assert word_bytes == 8
+    assert int.from_bytes(words[:8], 'little') == program.encoded[0][2]
+
+def test_diff_reports_changed_and_appended_words(tmp_path):
+    before, after = str(tmp_path / "before.bin"), str(tmp_path / "after.bin")
+    dump.dump(before)
+    memory.store(3, 7)
+    memory.store(300, -1) # Past the end of the first dump
+    dump.dump(after)
+    assert dump.diff(before, after) == [('memory', 3, 0, 7), ('memory', 300, 0, 0xFFFFFFFF)]
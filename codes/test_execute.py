@@ -0,0 +1,35 @@
+# test_execute.py
+
+import pytest
+
+from storage import memory, register, variable
+from run import Program
+
+def run(program):
+    """Runs a loaded program until it exits; returns the exit code."""
+    with pytest.raises(SystemExit) as exit_info:
+        program.run()
+    return exit_info.value.code
+
+def test_arithmetic_and_store():
+    program = Program(["MOV #5, R1", "MOV #10, R2", "ADD R1, R2", "MOV R1, M7", "EOP"])
+    assert run(program) == 0
+    assert register.load(variable['R1']) == 15
+    assert register.load(variable['R2']) == 10
+    assert memory.load(variable['M7']) == 15
+
+def test_call_and_stack(capsys):
+    program = Program(["MOV #5, R1", "PUSH R1", "CALL SUB", "POP R2", "PRNT R2", "EOP",
+                       "DEF SUB", "MOV #20, R1", "PRNT R1", "RET"])
+    assert run(program) == 0
+    assert [line for line in capsys.readouterr().out.splitlines() if line.startswith("PRNT")] == ["PRNT: 20", "PRNT: 5"]
+
+def test_division_by_zero_exits_with_1(capsys):
+    program = Program(["MOV #4, R1", "DIV R1, R3", "EOP"])
+    assert run(program) == 1
+    assert "EXCEPTION: Attempted division by zero." in capsys.readouterr().out
+
+def test_pop_from_empty_stack():
+    program = Program(["POP R1", "EOP"])
+    with pytest.raises(IndexError):
+        program.run()
@@ -0,0 +1,36 @@
+# test_fixedpoint.py
+
+import pytest
+
+from storage import register, variable
+from fixedpoint import FixedPointProgram, Fixed
+
+def run(program, capsys):
+    """Runs a loaded program until it exits; returns its PRNT lines."""
+    with pytest.raises(SystemExit) as exit_info:
+        program.run()
+    assert exit_info.value.code == 0
+    return [line for line in capsys.readouterr().out.splitlines() if line.startswith("PRNT")]
+
+lines = ["MOV #200, R1", "MUL R1, #200", "PRNT R1", "MOV #3, R2", "DIV R2, #2", "PRNT R2", "EOP"]
+
+def test_overflow_saturates_and_is_counted(capsys):
+    program = FixedPointProgram(lines, verbose=False)
+    assert run(program, capsys) == ["PRNT: 256.0", "PRNT: 1"]
+    assert register.load(variable['R1']) == Fixed.limits()[1]
+    assert register.load(variable['FR']) == 1
+    assert program.overflows == 1
+
+def test_counts_start_at_zero_per_program(capsys):
+    first = FixedPointProgram(lines, verbose=False)
+    run(first, capsys)
+    second = FixedPointProgram(["MOV #2, R1", "ADD R1, #3", "PRNT R1", "EOP"], source_name="add.isa", verbose=False)
+    assert run(second, capsys) == ["PRNT: 5"]
+    assert (first.overflows, second.overflows) == (1, 0)
+    assert variable.locate(0) == "add.isa:1"
+
+def test_program_from_an_image_counts_overflows(capsys):
+    encoded = FixedPointProgram(lines, verbose=False).encoded
+    program = FixedPointProgram.fromImage(encoded)
+    assert run(program, capsys)[0] == "PRNT: 256.0"
+    assert program.overflows == 1
@@ -0,0 +1,44 @@
+# test_incremental.py
+
+from compiler import Instruction
+from incremental import IncrementalCompiler
+from run import Program
+from snapshot import Snapshot
+from storage import memory, variable
+
+source = ["MOV #2, R1", "CALL DOUBLE", "PRNT R1", "JMP DONE",
+          "DEF DOUBLE", "ADD R1, R1", "RET",
+          "DEF DONE", "EOP"]
+edited = ["MOV #2, R1", "MOV #3, R2", "CALL DOUBLE", "PRNT R1", "PRNT R2", "JMP DONE",
+          "DEF DOUBLE", "MUL R1, #2", "RET",
+          "DEF DONE", "EOP"]
+
+def compiled(encoded, code_words):
+    """Everything a compile leaves behind: the encoded list, the code words, labels and the source map."""
+    return (encoded, {pc: memory.data.get(pc) for pc in range(code_words)},
+            variable.symbols("label"), dict(variable.source))
+
+def test_recompile_matches_full_compile():
+    pristine = Snapshot()
+    try:
+        Program.resetRegisters()
+        incremental = IncrementalCompiler()
+        incremental.compile(source)
+        encoded = incremental.compile(edited)
+        assert incremental.stats["reused"] > 0 and incremental.stats["patched"] > 0
+        result = compiled(encoded, len(edited))
+        pristine.restore()
+
+        Program.resetRegisters()
+        full = Instruction.encodeProgram(edited, verbose=False)
+        assert result == compiled(full, len(edited))
+    finally:
+        pristine.release()
+
+def test_recompile_after_shrinking_clears_the_old_tail():
+    Program.resetRegisters()
+    incremental = IncrementalCompiler()
+    incremental.compile(edited)
+    encoded = incremental.compile(source)
+    assert [pc for pc, _, _ in encoded] == list(range(len(encoded)))
+    assert all(memory.data[pc] == 0 for pc in range(len(encoded), len(edited)))
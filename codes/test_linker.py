@@ -0,0 +1,34 @@
+# test_linker.py
+
+import pytest
+
+from storage import memory, register, variable
+from linker import Module, load
+
+def test_load_at_nonzero_base_starts_there(capsys):
+    main = Module.compile(["MOV #3, R1", "CALL INC", "PRNT R1", "EOP"], "main")
+    lib = Module.compile(["DEF INC", "ADD R1, #2", "RET"], "lib")
+    program = load([main, lib], base=40)
+    assert register.load(variable['PC']) == 40
+    assert [pc for pc, _, _ in program.encoded] == list(range(40, 46))
+    assert variable['INC'] == 44
+    assert memory.data[0] == 0 # Nothing was placed at the reset PC
+    with pytest.raises(SystemExit) as exit_info:
+        program.run()
+    assert exit_info.value.code == 0
+    assert [line for line in capsys.readouterr().out.splitlines() if line.startswith("PRNT")] == ["PRNT: 5"]
+
+def test_coverage_of_a_linked_program_uses_its_module_lines():
+    from run import Program
+    from cover import Coverage
+    Program(["PRNT #1", "PRNT #2", "PRNT #3", "EOP"], verbose=False) # Leaves a source map behind
+    main_lines = ["MOV #3, R1", "CALL INC", "EOP"]
+    main = Module.compile(main_lines, "main")
+    lib = Module.compile(["DEF INC", "ADD R1, #2", "RET", "PRNT R1"], "lib")
+    program = load([main, lib], base=40)
+    coverage = Coverage()
+    with pytest.raises(SystemExit):
+        program.run(coverage=coverage)
+    assert Coverage.lineMap("main") == {40: 1, 41: 2, 42: 3}
+    assert coverage.lines(Coverage.lineMap("lib")) == {2: (True, False, False), 3: (True, False, False), 4: (False, False, False)}
+    assert coverage.report(main_lines, Coverage.lineMap("main")).splitlines()[-1] == "Lines: 3/3 executed"
@@ -0,0 +1,71 @@
+# test_lockstep.py
+
+import io
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from run import Program
+from lockstep import Lockstep
+
+def scalarRun(lines, inputs, capsys, monkeypatch):
+    """Runs the program once per input set with Program.run; returns the printed values per lane."""
+    printed = []
+    for values in inputs:
+        monkeypatch.setattr(sys, "stdin", io.StringIO("".join(f"{value}\n" for value in values)))
+        program = Program(lines, verbose=False)
+        capsys.readouterr()
+        with pytest.raises(SystemExit):
+            program.run()
+        printed.append([line.split("PRNT: ")[1] for line in capsys.readouterr().out.splitlines() if "PRNT: " in line])
+    return printed
+
+def lockstepRun(lines, inputs, dtype=None):
+    """Runs all input sets in one Lockstep; returns (exit codes, printed values per lane, batch)."""
+    batch = Lockstep(Program(lines, verbose=False), inputs, dtype)
+    codes = batch.run()
+    printed = [[] for _ in inputs]
+    for _, lanes, values in batch.printed:
+        for lane, value in zip(lanes, values):
+            printed[lane].append(str(value))
+    return codes.tolist(), printed, batch
+
+def test_integer_lanes_match_program_run(capsys, monkeypatch):
+    lines = ["SCAN R1", "MUL R1, #3", "SUB R1, #2", "PRNT R1", "EOP"]
+    inputs = [[1], [4], [-5]]
+    codes, printed, batch = lockstepRun(lines, inputs)
+    assert batch.registers.dtype == np.int64
+    assert codes == [0, 0, 0]
+    assert printed == scalarRun(lines, inputs, capsys, monkeypatch) == [["1"], ["10"], ["-17"]]
+
+def test_float_lanes_round_like_storage(capsys, monkeypatch):
+    lines = ["SCAN R1", "MUL R1, #3", "PUSH R1", "POP R2", "ADD R2, R1", "PRNT R2", "EOP"]
+    inputs = [[0.1], [2.37], [1.01]]
+    codes, printed, batch = lockstepRun(lines, inputs)
+    assert batch.registers.dtype == np.float64
+    assert codes == [0, 0, 0]
+    assert printed == scalarRun(lines, inputs, capsys, monkeypatch)
+
+def test_mixed_inputs_keep_their_types(capsys, monkeypatch):
+    lines = ["SCAN R1", "ADD R1, #1", "PRNT R1", "EOP"]
+    inputs = [[3], [3.0], [0.25]]
+    codes, printed, batch = lockstepRun(lines, inputs)
+    assert batch.registers.dtype == object
+    assert printed == scalarRun(lines, inputs, capsys, monkeypatch) == [["4"], ["4.0"], ["1.25"]]
+
+def test_division_by_zero_ends_only_its_lanes():
+    lines = ["SCAN R1", "MOV #6, R2", "DIV R2, R1", "PRNT R2", "EOP"]
+    codes, printed, _ = lockstepRun(lines, [[0], [2], [4]])
+    assert codes == [1, 0, 0]
+    assert printed[1:] == [["3"], ["1"]]
+
+def test_lanes_split_and_rejoin_on_calls():
+    lines = ["SCAN R1", "CALL *R1", "PRNT R2", "EOP",
+             "DEF F1", "MOV #1, R2", "RET", "DEF F2", "MOV #2, R2", "RET"]
+    program = Program(lines, verbose=False)
+    entries = [address for address, (opcode, *_) in sorted(Lockstep(program, [[0]]).code.items()) if opcode == "MOV"]
+    codes, printed, _ = lockstepRun(lines, [[entries[0]], [entries[1]], [entries[0]]])
+    assert codes == [0, 0, 0]
+    assert printed == [["1"], ["2"], ["1"]]
@@ -0,0 +1,49 @@
+# test_memo.py
+
+import pytest
+
+from run import Program
+from snapshot import Snapshot
+from storage import memory, register
+
+lines = ["MOV #3, R1", "CALL F", "MOV R2, R3", "MOV #3, R1", "CALL F", "PRNT R2", "EOP",
+         "DEF F", "PUSH R1", "ADD R1, #1", "MOV R1, R2", "POP R1", "RET"]
+
+def finalState(memoize):
+    program = Program(lines, verbose=False)
+    memo = program.memoize() if memoize else None
+    with pytest.raises(SystemExit) as exit_info:
+        program.run()
+    assert exit_info.value.code == 0
+    return dict(register.data), dict(memory.data), memo
+
+def test_hit_leaves_the_state_of_a_real_call():
+    pristine = Snapshot()
+    try:
+        registers, words, _ = finalState(False)
+        pristine.restore()
+        memo_registers, memo_words, memo = finalState(True)
+    finally:
+        pristine.release()
+    assert (memo.hits, memo.misses) == (1, 1)
+    assert memo_registers == registers
+    assert memo_words == words # Return address and scratch slots above TSP included
+
+def test_call_to_a_register_fails_before_the_cache():
+    # R1 is register 1 and F starts at address 1, which is cached after the first CALL
+    program = Program(["JMP MAIN", "DEF F", "RET", "DEF MAIN", "CALL F", "CALL R1", "EOP"], verbose=False)
+    program.memoize()
+    with pytest.raises(ValueError, match="CALL instruction expects a direct memory address"):
+        program.run()
+
+def test_int_and_float_inputs_are_cached_apart(capsys, monkeypatch):
+    program = Program(["MOV #3, R1", "CALL F", "PRNT R2", "SCAN R1", "CALL F", "PRNT R2", "EOP",
+                       "DEF F", "MOV R1, R2", "ADD R2, #1", "RET"], verbose=False)
+    memo = program.memoize()
+    monkeypatch.setattr("builtins.input", lambda prompt="": "3.0")
+    capsys.readouterr()
+    with pytest.raises(SystemExit):
+        program.run()
+    printed = [line for line in capsys.readouterr().out.splitlines() if line.startswith("PRNT")]
+    assert printed == ["PRNT: 4", "PRNT: 4.0"]
+    assert (memo.hits, memo.misses) == (0, 2)
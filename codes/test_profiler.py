@@ -0,0 +1,48 @@
+# test_profiler.py
+
+import json
+
+import pytest
+
+from storage import register, memory
+from run import Program
+from profiler import Profiler
+
+lines = ["MOV #3, R1", "CALL F", "CALL F", "PRNT R1", "EOP", "DEF F", "ADD R1, #2", "RET"]
+
+def profile(program):
+    profiler = Profiler()
+    with pytest.raises(SystemExit):
+        program.run(profiler=profiler)
+    return profiler
+
+def test_counts_and_call_stacks():
+    profiler = profile(Program(lines, verbose=False))
+    assert profiler.instructions == 9
+    assert {op: count for op, (count, _) in profiler.opcodes.items()} == {"MOV": 1, "CALL": 2, "ADD": 2, "RET": 2, "PRNT": 1, "EOP": 1}
+    assert profiler.pcs == {0: 1, 1: 1, 2: 1, 5: 2, 6: 2, 3: 1, 4: 1}
+    assert profiler.stacks["main;F;ADD"][0] == 2
+    assert profiler.stacks["main;PRNT"][0] == 1
+    assert profiler.register_access[1] == [3, 3] # R1: MOV writes, ADD reads and writes twice, PRNT reads
+    assert "main;F;RET 2" in profiler.collapsed().splitlines()
+
+def test_storage_hooks_removed_after_the_run():
+    profile(Program(lines, verbose=False))
+    assert 'load' not in register.__dict__ and 'load' not in memory.__dict__
+
+def test_memoized_calls_stay_in_the_caller_frame():
+    program = Program(["MOV #3, R1", "CALL F", "CALL F", "PRNT R2", "EOP", "DEF F", "MOV R1, R2", "ADD R2, #2", "RET"],
+                      verbose=False)
+    memo = program.memoize()
+    profiler = profile(program)
+    assert (memo.hits, memo.misses) == (1, 1)
+    # The body runs inside the CALL, so every sample is charged to main
+    assert set(profiler.stacks) == {"main;MOV", "main;CALL", "main;PRNT", "main;EOP"}
+
+def test_json_dump(tmp_path):
+    profiler = profile(Program(lines, verbose=False))
+    profiler.dumpJSON(str(tmp_path / "profile.json"))
+    with open(tmp_path / "profile.json") as f:
+        dumped = json.load(f)
+    assert dumped["instructions"] == 9
+    assert dumped["opcodes"]["CALL"]["count"] == 2
@@ -0,0 +1,62 @@
+# test_segment.py
+
+import struct
+
+import pytest
+
+from storage import memory, register, variable
+from run import Program
+from segment import attach, detach
+
+def dataFile(tmp_path, fmt, values):
+    path = tmp_path / "data.bin"
+    path.write_bytes(struct.pack(f"={len(values)}{fmt}", *values))
+    return path
+
+def run(program):
+    with pytest.raises(SystemExit) as exit_info:
+        program.run()
+    return exit_info.value.code
+
+def test_program_reads_and_writes_a_private_segment(tmp_path):
+    path = dataFile(tmp_path, "i", [10, 20, 30])
+    program = Program(["MOV A1, R1", "ADD R1, #1", "MOV R1, A1", "EOP"], verbose=False)
+    segment = attach(str(path), 220)
+    try:
+        register.store(variable['A1'], 221)
+        assert run(program) == 0
+        assert register.load(variable['R1']) == 21
+        assert memory.load(221) == 21
+        assert memory.load(220) == 10
+    finally:
+        detach(segment)
+    assert path.read_bytes() == struct.pack("=3i", 10, 20, 30) # Copy-on-write: the file is untouched
+    assert type(memory.data) is dict
+
+def test_write_through_lands_in_the_file(tmp_path):
+    path = dataFile(tmp_path, "f", [1.5, 2.5])
+    segment = attach(str(path), 230, dtype='f', write_through=True)
+    try:
+        assert memory.load(231) == 2.5
+        memory.store(230, 4.25)
+    finally:
+        detach(segment)
+    assert struct.unpack("=2f", path.read_bytes()) == (4.25, 2.5)
+
+def test_overlapping_segments_are_rejected(tmp_path):
+    path = dataFile(tmp_path, "i", [1, 2, 3, 4])
+    segment = attach(str(path), 220)
+    try:
+        with pytest.raises(ValueError, match="overlaps"):
+            attach(str(path), 222)
+        assert len(memory.data.segments) == 1
+    finally:
+        detach(segment)
+
+def test_out_of_range_int_store(tmp_path):
+    segment = attach(str(dataFile(tmp_path, "i", [0])), 240)
+    try:
+        with pytest.raises(ValueError, match="does not fit"):
+            memory.store(240, 2**31)
+    finally:
+        detach(segment)
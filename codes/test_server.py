@@ -0,0 +1,41 @@
+# test_server.py
+
+import threading
+
+import pytest
+
+import server
+
+@pytest.fixture
+def worker():
+    """Prepares this process the way the pool initializer prepares a worker."""
+    server.warmWorker()
+    yield
+    server.pristine.release()
+    server.pristine = None
+
+def test_job_runs_and_resets_the_vm(worker):
+    from storage import register, variable
+    result = server.runJob({"source": "SCAN R1\nADD R1, #2\nPRNT R1\nEOP", "input": [5]})
+    assert (result["exit"], result["error"]) == (0, None)
+    assert "PRNT: 7" in result["output"]
+    assert result["registers"][str(variable['R1'])] == 7
+    assert register.load(variable['R1']) == 0
+
+def test_endless_job_fails_with_a_timeout(worker):
+    result = server.runJob({"source": ["DEF LOOP", "JMP LOOP"]}, timeout=0.2)
+    assert result["exit"] is None
+    assert result["error"].startswith("TimeoutError")
+    assert server.runJob({"source": ["PRNT #1", "EOP"]})["exit"] == 0 # The worker is usable again
+
+def test_server_answers_an_endless_job(tmp_path):
+    path = str(tmp_path / "isa.sock")
+    with server.Server(path, 1, timeout=0.5) as resident:
+        thread = threading.Thread(target=resident.serve_forever, daemon=True)
+        thread.start()
+        try:
+            response = server.submit(path, source="DEF LOOP\nJMP LOOP")
+            assert response["error"].startswith("TimeoutError")
+            assert server.submit(path, source="PRNT #4\nEOP")["output"].count("PRNT: 4") == 1
+        finally:
+            resident.shutdown()
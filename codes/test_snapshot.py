@@ -0,0 +1,38 @@
+# test_snapshot.py
+
+from storage import register, memory, variable, setAddressSpace
+from convert import Length
+from snapshot import Snapshot
+from run import Program
+
+def test_restore_undoes_a_program_load():
+    snapshot = Snapshot()
+    memory_before, register_before, labels_before = dict(memory.data), dict(register.data), dict(variable)
+    Program(["DEF START", "MOV #7, R1", "EOP"], source_name="start.isa")
+    snapshot.restore()
+    snapshot.release()
+    assert dict(memory.data) == memory_before
+    assert dict(register.data) == register_before
+    assert dict(variable) == labels_before
+    assert variable.locate(0) is None
+
+def test_restore_undoes_set_storage():
+    size = memory.max_size
+    memory.data.pop(size - 1)
+    snapshot = Snapshot()
+    memory.setStorage(size) # Fills the slot in without store()
+    assert memory.data[size - 1] == 0
+    snapshot.restore()
+    snapshot.release()
+    assert size - 1 not in memory.data
+
+def test_restore_undoes_set_address_space():
+    snapshot = Snapshot()
+    data = memory.data
+    setAddressSpace(16)
+    memory.store(40000, 5)
+    snapshot.restore()
+    snapshot.release()
+    assert Length.opAddr == 8 and Length.instrxn == 32
+    assert memory.data is data and memory.max_size == 256
+    assert 40000 not in memory.data
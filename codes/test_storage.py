@@ -0,0 +1,48 @@
+# test_storage.py
+
+import pytest
+
+from storage import memory, setAddressSpace
+from convert import Length
+from run import Program
+from tracer import TraceBuffer, WORD
+
+@pytest.mark.parametrize("bits", [0, 25, 27])
+def test_set_address_space_rejects_widths_outside_1_to_24(bits):
+    with pytest.raises(ValueError):
+        setAddressSpace(bits)
+    assert Length.opAddr == 8
+
+def test_widest_words_fit_64_bit_trace_entries(tmp_path):
+    setAddressSpace(24)
+    assert Length.instrxn == 64
+    assert memory.max_size == 2**24
+    program = Program(["MOV #16777215, R1", "PRNT R1", "EOP"])
+    tracer = TraceBuffer(8, path=str(tmp_path / "trace.bin"))
+    with pytest.raises(SystemExit):
+        program.run(tracer=tracer)
+    recorded, entries, op_addr = TraceBuffer.load(str(tmp_path / "trace.bin"))
+    assert (recorded, op_addr) == (3, 24)
+    assert [entry[WORD] for entry in entries] == [instruction_int for _, _, instruction_int in program.encoded]
+
+def test_hooks_unhook_in_any_order():
+    calls = []
+    installed = list(memory.hooks.get('store', []))
+    def tagged(tag):
+        def wrap(store):
+            def tagged_store(address, value):
+                calls.append(tag)
+                store(address, value)
+            return tagged_store
+        return wrap
+    first = memory.hook('store', tagged("first"))
+    second = memory.hook('store', tagged("second"))
+    memory.store(100, 1)
+    assert calls == ["second", "first"]
+    memory.unhook(first)
+    memory.store(100, 2)
+    assert calls == ["second", "first", "second"]
+    memory.unhook(second)
+    memory.store(100, 3)
+    assert len(calls) == 3 and memory.data[100] == 3
+    assert memory.hooks['store'] == installed
@@ -0,0 +1,47 @@
+# test_tracer.py
+
+import pytest
+
+from convert import Length
+from storage import setAddressSpace
+from run import Program
+from tracer import TraceBuffer, FIELDS
+
+def trace(program, size=16, path=None):
+    tracer = TraceBuffer(size, path=path)
+    with pytest.raises(SystemExit):
+        program.run(tracer=tracer)
+    return tracer
+
+def test_dump_decodes_under_the_recording_layout(tmp_path):
+    setAddressSpace(16)
+    trace(Program(["MOV #300, R2", "ADD R2, #1", "EOP"], verbose=False), path=str(tmp_path / "trace.bin"))
+    Length.setOpAddr(8) # A later process with the default layout
+    recorded, entries, op_addr = TraceBuffer.load(str(tmp_path / "trace.bin"))
+    assert op_addr == 16
+    lines = TraceBuffer.disassemble(entries, op_addr)
+    assert lines[0].split() == ["0:", "MOV", "#300,", "R2", "wrote", "300"]
+    assert lines[1].split()[1:4] == ["ADD", "R2,", "#1"]
+    assert Length.opAddr == 8
+
+def test_rejects_other_versions(tmp_path):
+    path = tmp_path / "trace.bin"
+    path.write_bytes(b"ISAT" + (1).to_bytes(2, "little") + bytes(16))
+    with pytest.raises(ValueError, match="Not a trace dump"):
+        TraceBuffer.load(str(path))
+
+def test_records_reads_and_writes():
+    tracer = trace(Program(["MOV #5, R1", "ADD R1, #2", "PRNT R1", "EOP"], verbose=False))
+    assert tracer.recorded == 4
+    entries = tracer.ordered()
+    lines = TraceBuffer.disassemble(tuple(entries[i:i + FIELDS]) for i in range(0, len(entries), FIELDS))
+    assert lines[0].split() == ["0:", "MOV", "#5,", "R1", "wrote", "5"]
+    assert lines[1].split() == ["1:", "ADD", "R1,", "#2", "read", "5", "wrote", "7"]
+    assert lines[2].split() == ["2:", "PRNT", "R1", "read", "7"]
+
+def test_ring_buffer_keeps_the_last_entries(tmp_path):
+    lines = [f"MOV #{i}, R1" for i in range(10)] + ["EOP"]
+    trace(Program(lines, verbose=False), size=4, path=str(tmp_path / "trace.bin"))
+    recorded, entries, _ = TraceBuffer.load(str(tmp_path / "trace.bin"))
+    assert recorded == 11
+    assert [entry[0] for entry in entries] == [7, 8, 9, 10] # Oldest first
@@ -0,0 +1,61 @@
+# test_verifier.py
+
+import pytest
+
+from snapshot import Snapshot
+from run import Program
+
+def printed(capsys):
+    return [line for line in capsys.readouterr().out.splitlines() if line.startswith("PRNT")]
+
+def run(program):
+    with pytest.raises(SystemExit):
+        program.run()
+
+@pytest.mark.parametrize("store", ["MOV R1, M3", "POP M2", "ADD M1, #1", "MOV R1, [M4]"])
+def test_verify_rejects_stores_into_the_code(store):
+    # M1..M7 alias addresses 1..7, which hold this program's instructions; the bare PRNT at 4 encodes as 0,
+    # so [M4] points at address 0
+    program = Program(["MOV #9, R1", "PUSH R1", store, "PRNT R1", "PRNT", "EOP"])
+    with pytest.raises(ValueError, match="writes into the code"):
+        program.verify()
+
+def test_verify_rejects_registers_outside_the_register_file():
+    program = Program.fromImage([(0, int("0100000" + "000" + "11111111" + "010" + "00000001" + "000", 2))]) # MOV 255, #1
+    with pytest.raises(ValueError, match="outside the register file"):
+        program.verify()
+
+def test_verified_run_matches_run_when_code_is_overwritten_through_a_register(capsys):
+    lines = ["MOV #4, R2", "MOV M6, *R2", "MOV #9, R1", "PRNT R1", "PRNT R1", "EOP", "PRNT #7"]
+    snapshot = Snapshot()
+    run(Program(lines))
+    expected = printed(capsys)
+    snapshot.restore()
+    program = Program(lines)
+    program.verify()
+    run(program)
+    snapshot.release()
+    assert expected == ["PRNT: 9", "PRNT: 7"]
+    assert printed(capsys) == expected
+
+def test_verified_run_matches_run(capsys):
+    lines = ["MOV #200, R6", "MOV #3, *R6", "MOV #200, R6", "ADD R1, *R6", "PUSH R1", "CALL F", "POP R2",
+             "PRNT R2", "PRNT R3", "EOP", "DEF F", "MUL R1, #4", "MOV R1, R3", "RET"]
+    snapshot = Snapshot()
+    run(Program(lines))
+    expected = printed(capsys)
+    snapshot.restore()
+    program = Program(lines)
+    program.verify()
+    run(program)
+    snapshot.release()
+    assert expected == ["PRNT: 3", "PRNT: 12"]
+    assert printed(capsys) == expected
+
+def test_verified_subclass_keeps_its_own_semantics(capsys):
+    from fixedpoint import FixedPointProgram
+    program = FixedPointProgram(["MOV #200, R1", "MUL R1, #200", "PRNT R1", "EOP"], verbose=False)
+    program.verify()
+    run(program)
+    assert printed(capsys) == ["PRNT: 256.0"]
+    assert program.overflows == 1
@@ -0,0 +1,61 @@
+# test_workload.py
+
+import pytest
+
+from storage import register, memory, variable
+from run import Program, program_registers
+from profiler import Profiler
+from workload import generate
+
+def runWorkload(workload):
+    """Runs a workload to its EOP; returns (exit code, instructions executed)."""
+    workload.prepare()
+    try:
+        program = Program(workload.lines, verbose=False)
+        profiler = Profiler()
+        with pytest.raises(SystemExit) as exit_info:
+            program.run(profiler=profiler)
+    finally:
+        workload.release()
+    return exit_info.value.code, profiler.instructions
+
+def test_two_workloads_in_one_process():
+    stack = dict(program_registers)
+    first = generate(400, call_depth=2, seed=1)
+    assert runWorkload(first) == (0, first.executed)
+    assert program_registers == stack
+    second = generate(330, call_depth=2, seed=2) # Shorter than the first one's stack base
+    assert second.data_base >= len(second.lines)
+    assert runWorkload(second) == (0, second.executed)
+    assert program_registers == stack
+
+@pytest.mark.parametrize("seed", range(4))
+def test_executed_count_with_pointer_destinations(seed):
+    workload = generate(48, modes={"register": 1, "register_indirect": 2, "indexed": 1}, loop_depth=1, seed=seed)
+    assert runWorkload(workload) == (0, workload.executed)
+
+def test_indexed_operands_use_the_data_area():
+    workload = generate(24, mix={"MOV": 1, "ADD": 1}, modes={"indexed": 1, "immediate": 1}, seed=3)
+    assert any("A1" in line for line in workload.lines)
+    written = []
+    def recordStores(store):
+        def recording_store(address, value):
+            written.append(address)
+            store(address, value)
+        return recording_store
+    workload.prepare()
+    try:
+        program = Program(workload.lines, verbose=False)
+        code = {pc: memory.load(pc) for pc in range(len(program.encoded))}
+        handle = memory.hook('store', recordStores)
+        try:
+            with pytest.raises(SystemExit):
+                program.run()
+        finally:
+            memory.unhook(handle)
+    finally:
+        workload.release()
+    assert register.load(variable['A1']) == workload.data_base
+    assert written and set(written) == {workload.data_base}
+    assert {pc: memory.load(pc) for pc in code} == code
+    assert 'A1' not in program_registers
@@ -0,0 +1,167 @@
+# tracer.py
+
+import struct
+import sys
+from array import array
+
+from storage import register, memory
+from convert import Precision, Length
+from compiler import Instruction
+
+# One entry per executed instruction, each field a 64-bit unsigned integer.
+PC, WORD, READ1, READ2, WRITTEN, FLAGS = range(6)
+FIELDS = 6
+
+# FLAGS bits: how many of READ1/READ2 were filled, and whether WRITTEN was.
+READ_COUNT_MASK = 0b011
+WRITE_FLAG = 0b100
+
+HEADER = struct.Struct("<4sHHIIH") # magic, version, fields per entry, entries, instructions recorded, operand address bits
+MAGIC = b"ISAT"
+VERSION = 2
+
+class TraceBuffer:
+    """
+    Fixed-size ring buffer of the last executed instructions, stored as packed integers:
+    PC, instruction word, the first two operand values read and the last value written.
+    Pass an instance to Program.run(tracer=...). If 'path' is given the buffer is dumped there
+    when the run stops, including EOP and Program.exception.
+    """
+    def __init__(self, size=4096, path=None):
+        self.size = size
+        self.path = path
+        self.entries = array('Q', bytes(8 * FIELDS * size)) # Preallocated, never resized
+        self.recorded = 0 # Total instructions seen; the buffer keeps the last 'size' of them
+        self._base = 0
+        self._active = False # True only while an instruction executes, so fetches are not recorded
+        self._hooks = [] # (storage, hook handle) installed by start()
+
+    @staticmethod
+    def pack(value):
+        """Packs a stored value into a 32-bit word (ints two's complement, floats as spbin)."""
+        if isinstance(value, str):
+            return int(value, 2)
+        if isinstance(value, float):
+            return int(Precision.dec2spbin(value), 2)
+        return value & 0xFFFFFFFF
+
+    # --- Monitor protocol (see Program.runMonitored) ---
+
+    def start(self):
+        self._hook(register)
+        self._hook(memory)
+
+    def enter(self, pc, instruction_int, opcode_str):
+        base = (self.recorded % self.size) * FIELDS
+        entries = self.entries
+        entries[base + PC] = pc
+        entries[base + WORD] = instruction_int
+        entries[base + READ1] = 0
+        entries[base + READ2] = 0
+        entries[base + WRITTEN] = 0
+        entries[base + FLAGS] = 0
+        self._base = base
+        self._active = True
+        self.recorded += 1
+
+    def leave(self):
+        self._active = False
+
+    def stop(self):
+        self._active = False
+        for storage, handle in self._hooks:
+            storage.unhook(handle)
+        self._hooks = []
+        if self.path is not None:
+            self.dump(self.path)
+
+    def _hook(self, storage):
+        """Hooks recording wrappers around load/store of one Storage instance until stop()."""
+        entries = self.entries
+        pack = TraceBuffer.pack
+
+        def recordLoads(load):
+            def recording_load(address, isCode=False):
+                value = load(address, isCode)
+                if self._active and not isCode:
+                    flags = entries[self._base + FLAGS]
+                    reads = flags & READ_COUNT_MASK
+                    if reads < 2:
+                        entries[self._base + READ1 + reads] = pack(value)
+                        entries[self._base + FLAGS] = flags + 1
+                return value
+            return recording_load
+
+        def recordStores(store):
+            def recording_store(address, value):
+                store(address, value)
+                if self._active:
+                    entries[self._base + WRITTEN] = pack(value)
+                    entries[self._base + FLAGS] |= WRITE_FLAG
+            return recording_store
+
+        self._hooks.append((storage, storage.hook('load', recordLoads)))
+        self._hooks.append((storage, storage.hook('store', recordStores)))
+
+    # --- Dump and offline decoding ---
+
+    def ordered(self):
+        """Returns the recorded entries as an array, oldest first."""
+        if self.recorded <= self.size:
+            return self.entries[:self.recorded * FIELDS]
+        split = (self.recorded % self.size) * FIELDS
+        return self.entries[split:] + self.entries[:split]
+
+    def dump(self, path):
+        """Writes the header and the packed entries (oldest first) to 'path'."""
+        entries = self.ordered()
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, FIELDS, len(entries) // FIELDS, self.recorded, Length.opAddr) + entries.tobytes())
+
+    @staticmethod
+    def load(path):
+        """
+        Reads a dump back. Returns (instructions_recorded, list of entry tuples, operand address
+        bits the words were encoded with); pass the last one to disassemble().
+        """
+        with open(path, 'rb') as f:
+            raw = f.read()
+        magic, version = raw[:4], int.from_bytes(raw[4:6], "little")
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a trace dump: {path}")
+        _, _, fields, count, recorded, op_addr = HEADER.unpack_from(raw)
+        entries = array('Q')
+        entries.frombytes(raw[HEADER.size:HEADER.size + 8 * fields * count])
+        return recorded, [tuple(entries[i:i + fields]) for i in range(0, len(entries), fields)], op_addr
+
+    @staticmethod
+    def disassemble(entries, op_addr=None):
+        """
+        Returns one line of text per entry: PC, disassembled instruction, values read and written.
+        op_addr: operand address bits of the recording process (see load()); the current layout if None.
+        """
+        saved = Length.opAddr
+        if op_addr is not None:
+            Length.setOpAddr(op_addr)
+        try:
+            lines = []
+            for entry in entries:
+                reads = [str(entry[READ1 + i]) for i in range(entry[FLAGS] & READ_COUNT_MASK)]
+                line = f"{entry[PC]:5}: {Instruction.disassemble(entry[WORD]):<24}"
+                if reads:
+                    line += " read " + ", ".join(reads)
+                if entry[FLAGS] & WRITE_FLAG:
+                    line += f" wrote {entry[WRITTEN]}"
+                lines.append(line)
+            return lines
+        finally:
+            if Length.opAddr != saved:
+                Length.setOpAddr(saved)
+
+
+if __name__ == "__main__":
+    # Usage: python tracer.py trace.bin
+    recorded, trace_entries, trace_op_addr = TraceBuffer.load(sys.argv[1])
+    print(f"Last {len(trace_entries)} of {recorded} instructions:")
+    for text in TraceBuffer.disassemble(trace_entries, trace_op_addr):
+        print(text)
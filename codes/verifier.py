@@ -0,0 +1,122 @@
+# verifier.py
+
+from storage import register
+from compiler import Instruction
+from addressing import AddressingMode
+
+# Operand (1 or 2) that each opcode writes to; it can never be an immediate.
+write_operand = {"MOV": 2, "POP": 1, "SCAN": 1, "MOD": 1, "ADD": 1, "SUB": 1, "MUL": 1, "DIV": 1}
+jump_operations = ["JEQ", "JNE", "JLT", "JLE", "JGT", "JGE", "JMP", "CALL"]
+conditional_jumps = ["JEQ", "JNE", "JLT", "JLE", "JGT", "JGE"]
+legal_modes = [AddressingMode.register(None), AddressingMode.register_indirect(None), AddressingMode.immediate(None),
+               AddressingMode.indirect(None), AddressingMode.indexed(None), AddressingMode.direct(None)]
+# Modes whose address field names a register (R#, *R#, A#)
+register_modes = [AddressingMode.register(None), AddressingMode.register_indirect(None), AddressingMode.indexed(None)]
+
+class Verifier:
+    """
+    Load-time checks over an encoded program (the list returned by Instruction.encodeProgram):
+    valid opcodes, legal addressing modes, register operands inside the register file, no writes
+    to immediates, no direct writes into the loaded code (e.g. MOV R1, M3 while M3 holds an
+    instruction), jump/CALL targets inside the loaded code and, where it can be decided
+    statically, balanced PUSH/POP/CALL/RET stack use. Writes through registers or pointers that
+    reach the code at run time are caught by Program.runVerified instead.
+    """
+    @staticmethod
+    def check(encoded):
+        """Returns (decoded, problems): decoded maps pc -> Instruction.decode tuple."""
+        decoded = {pc: Instruction.decode(instruction_int) for pc, _, instruction_int in encoded}
+        words = {pc: instruction_int for pc, _, instruction_int in encoded}
+        problems = []
+
+        for pc, (opcode_str, op1_addr, op1_mode, op2_addr, op2_mode) in decoded.items():
+            if opcode_str == "UNKNOWN":
+                problems.append(f"PC {pc}: unknown opcode")
+                continue
+            for number, mode in ((1, op1_mode), (2, op2_mode)):
+                if mode not in legal_modes:
+                    problems.append(f"PC {pc}: {opcode_str} operand {number} uses unsupported addressing mode {mode}")
+                elif mode in register_modes and int(op1_addr if number == 1 else op2_addr, 2) not in register.data:
+                    problems.append(f"PC {pc}: {opcode_str} operand {number} names a register outside the register file")
+            if opcode_str in write_operand:
+                number = write_operand[opcode_str]
+                mode, address = (op1_mode, int(op1_addr, 2)) if number == 1 else (op2_mode, int(op2_addr, 2))
+                if mode == AddressingMode.immediate(None):
+                    problems.append(f"PC {pc}: {opcode_str} writes to an immediate operand")
+                elif mode == AddressingMode.direct(None) and address in decoded:
+                    problems.append(f"PC {pc}: {opcode_str} writes into the code at address {address}")
+                elif mode == AddressingMode.indirect(None) and words.get(address) in decoded:
+                    # The pointer is itself an instruction word, so its target is known at load time
+                    problems.append(f"PC {pc}: {opcode_str} writes into the code at address {words[address]} through [{address}]")
+            if opcode_str in jump_operations:
+                target = int(op1_addr, 2)
+                if op1_mode != AddressingMode.direct(None):
+                    problems.append(f"PC {pc}: {opcode_str} target must be a direct address (label)")
+                elif target not in decoded:
+                    problems.append(f"PC {pc}: {opcode_str} target {target} is outside the loaded code")
+
+        if not problems and encoded:
+            problems.extend(Verifier.checkStack(decoded, encoded[0][0]))
+        return decoded, problems
+
+    @staticmethod
+    def checkStack(decoded, entry):
+        """
+        Follows every path from 'entry' tracking the stack depth relative to the routine's start.
+        Reports underflow and RETs that leave values behind. Paths reaching the same PC with
+        different depths cannot be decided statically and are not followed further.
+        """
+        problems = []
+        routines = [(entry, False)] # (start pc, entered through CALL)
+        analysed = set()
+        while routines:
+            start, is_called = routines.pop()
+            if start in analysed:
+                continue
+            analysed.add(start)
+            depth_at = {}
+            pending = [(start, 0)]
+            while pending:
+                pc, depth = pending.pop()
+                if pc not in decoded:
+                    continue # Falls off the loaded code; not a stack question
+                if pc in depth_at:
+                    continue # Already followed (a different depth here is undecidable)
+                depth_at[pc] = depth
+                opcode_str, op1_addr = decoded[pc][0], decoded[pc][1]
+
+                if opcode_str == "PUSH":
+                    depth += 1
+                elif opcode_str == "POP":
+                    depth -= 1
+                    if depth < 0 and is_called:
+                        problems.append(f"PC {pc}: POP would take the return address of the routine at {start}")
+                        continue
+                    if depth < 0:
+                        problems.append(f"PC {pc}: POP from an empty stack")
+                        continue
+                elif opcode_str == "RET":
+                    if not is_called:
+                        problems.append(f"PC {pc}: RET outside a called routine")
+                    elif depth != 0:
+                        problems.append(f"PC {pc}: RET leaves {depth} value(s) on the stack of the routine at {start}")
+                    continue
+                elif opcode_str == "EOP":
+                    continue
+                elif opcode_str == "CALL":
+                    routines.append((int(op1_addr, 2), True))
+                elif opcode_str == "JMP":
+                    pending.append((int(op1_addr, 2), depth))
+                    continue
+                elif opcode_str in conditional_jumps:
+                    pending.append((int(op1_addr, 2), depth))
+                pending.append((pc + 1, depth))
+        return problems
+
+    @staticmethod
+    def verify(encoded):
+        """Returns the pc -> decoded instruction table, or raises ValueError listing every problem."""
+        decoded, problems = Verifier.check(encoded)
+        if problems:
+            raise ValueError("Program verification failed:\n" + "\n".join(problems))
+        return decoded
@@ -0,0 +1,188 @@
+# workload.py
+"""
+Synthetic ISA programs for benchmarks, with a configurable size, opcode mix, addressing-mode mix,
+loop depth and call depth.
+
+Generated programs always end: conditional jumps are not implemented by the interpreter, so a
+loop level is unrolled (its body is emitted loop_count times) instead of jumping back, and
+subroutines form a CALL chain F1 -> F2 -> ... that returns. DIV and MUL only take non-zero
+immediates, PUSH/POP stay balanced and memory operands go through pointer registers into a data
+area outside the code and the stack, so the number of executed instructions is known in advance.
+R6 is set by the program itself; A1 cannot be (as a destination it names memory[A1]), so
+Workload.prepare() loads it with the data area's address.
+"""
+
+import random
+
+from storage import setAddressSpace, mspr, mvpr
+from run import program_registers
+
+default_mix = {"MOV": 4, "ADD": 3, "SUB": 2, "MUL": 1, "DIV": 1, "PUSH": 1, "CALL": 1, "PRNT": 0}
+default_modes = {"register": 3, "immediate": 3, "register_indirect": 1, "indexed": 1}
+
+data_registers = ["R1", "R2", "R3", "R4", "R5"]
+pointer_register = "R6" # *R6 reads auto-increment it
+index_register = "A1" # Loaded by Workload.prepare(), not by the program
+data_words = 8
+stack_words = 40
+max_call_depth = 10
+max_push_depth = 4 # With up to 2 pushed per subroutine, the deepest chain needs 34 stack words
+
+class Workload:
+    """
+    A generated program: lines (source), executed (instructions run from START to EOP) and the
+    memory layout it expects. Call prepare() before compiling it and release() when done with it.
+    """
+    def __init__(self, lines, executed, addr_bits, stack_base, data_base):
+        self.lines = lines
+        self.executed = executed
+        self.addr_bits = addr_bits # None: fits the default 8-bit layout
+        self.stack_base = stack_base
+        self.data_base = data_base
+        self._saved = None # program_registers values replaced by prepare() (None: not there before)
+
+    def prepare(self):
+        """
+        Widens the address space when the program needs it and, until release(), makes Program
+        load the stack registers with this workload's stack and the index register with its data area.
+        """
+        if self.addr_bits is not None:
+            setAddressSpace(self.addr_bits)
+        if self._saved is None:
+            self._saved = {name: program_registers.get(name) for name in ('SPR', 'TSP', index_register)}
+        program_registers['SPR'] = self.stack_base
+        program_registers['TSP'] = self.stack_base - 1
+        program_registers[index_register] = self.data_base
+
+    def release(self):
+        """Puts back the program_registers entries replaced by prepare()."""
+        if self._saved is not None:
+            for name, value in self._saved.items():
+                if value is None:
+                    program_registers.pop(name, None)
+                else:
+                    program_registers[name] = value
+            self._saved = None
+
+class Generator:
+    def __init__(self, mix, modes, rng):
+        self.mix = {op: weight for op, weight in (mix or default_mix).items() if weight > 0}
+        self.modes = {mode: weight for mode, weight in (modes or default_modes).items() if weight > 0}
+        self.rng = rng
+        self.reads = 0 # *R6 reads since the pointer was last reset
+
+    def pick(self, weights):
+        return self.rng.choices(list(weights), list(weights.values()))[0]
+
+    def source(self, in_main):
+        # *R6 auto-increments, so it is only used in main code, where the emitted reads are counted.
+        mode = self.pick(self.modes)
+        if mode == "register_indirect" and not in_main:
+            mode = "register"
+        if mode == "immediate":
+            return f"#{self.rng.randint(0, 9)}"
+        if mode == "register_indirect":
+            self.reads += 1
+            return "*" + pointer_register
+        if mode == "indexed":
+            return index_register
+        return self.rng.choice(data_registers)
+
+    def destination(self, read):
+        # read: the instruction also reads its destination (ADD, MUL, ...), and a *R6 read would
+        # auto-increment the pointer before the write, so those write through A1 instead.
+        mode = self.pick(self.modes)
+        if mode == "register_indirect" and read:
+            mode = "indexed"
+        if mode == "register_indirect":
+            return "*" + pointer_register # Writes do not increment
+        if mode == "indexed":
+            return index_register
+        return self.rng.choice(data_registers)
+
+    def block(self, count, in_main, calls):
+        """Returns 'count' straight-line instructions with balanced PUSH/POP."""
+        mix = self.mix if calls else {op: weight for op, weight in self.mix.items() if op != "CALL"}
+        lines = []
+        depth = 0
+        while len(lines) < count:
+            op = self.pick(mix) if mix else "MOV"
+            if op == "CALL":
+                lines.append("CALL F1")
+                continue
+            if op == "PUSH":
+                if depth < max_push_depth and len(lines) + depth + 2 <= count:
+                    lines.append(f"PUSH {self.source(in_main)}")
+                    depth += 1
+                    continue
+                if depth > 0:
+                    lines.append(f"POP {self.rng.choice(data_registers)}")
+                    depth -= 1
+                    continue
+                op = "MOV" # No room for a PUSH/POP pair
+            if op in ("MUL", "DIV"):
+                low = 2 if op == "MUL" else 1
+                lines.append(f"{op} {self.destination(True)}, #{self.rng.randint(low, 3 if op == 'MUL' else 9)}")
+            elif op == "MOV":
+                lines.append(f"MOV {self.source(in_main)}, {self.destination(False)}")
+            elif op == "PRNT":
+                lines.append(f"PRNT {self.source(in_main)}")
+            else:
+                lines.append(f"{op} {self.destination(True)}, {self.source(in_main)}")
+            if in_main and self.reads >= data_words:
+                lines.append(f"MOV #DATA, {pointer_register}") # Keeps *R6 inside the data area
+                self.reads = 0
+        lines.extend(f"POP {self.rng.choice(data_registers)}" for _ in range(depth))
+        return lines
+
+def unroll(body, depth, count):
+    for _ in range(depth):
+        body = body * count
+    return body
+
+def generate(size=64, mix=None, modes=None, loop_depth=0, loop_count=2, call_depth=0, seed=0,
+             stack_base=mspr, data_base=mvpr):
+    """
+    Returns a Workload whose main code has about 'size' instructions per loop body, repeated
+    loop_count**loop_depth times, and a chain of call_depth subroutines of up to 4 instructions each.
+    mix and modes map opcodes/addressing modes to relative weights (see default_mix, default_modes).
+    stack_base and data_base are the layout used when the code fits below the stack; longer
+    programs get the stack and data placed after their code in a wider address space.
+    """
+    if not 0 <= call_depth <= max_call_depth:
+        raise ValueError(f"Call depth must be between 0 and {max_call_depth}, got {call_depth}")
+    generator = Generator(mix, modes, random.Random(seed))
+
+    body = generator.block(size, True, call_depth > 0)
+    if loop_depth > 0 and generator.reads:
+        body = [f"MOV #DATA, {pointer_register}"] + body # Every iteration reads the same data words
+    main = unroll(body, loop_depth, loop_count)
+    routines = []
+    chain = 0 # Instructions executed per CALL F1
+    for level in range(1, call_depth + 1):
+        routine = generator.block(generator.rng.randint(1, 4), False, False)
+        if level < call_depth:
+            routine.append(f"CALL F{level + 1}")
+        routine.append("RET")
+        chain += len(routine)
+        routines.append((f"F{level}", routine))
+
+    init = [f"MOV #DATA, {pointer_register}"] # index_register is loaded by Workload.prepare()
+    code_length = len(init) + len(main) + 1 + sum(len(routine) for _, routine in routines)
+
+    # Default layout: code below the stack at 112, data in the VPR area at 200.
+    if code_length <= stack_base and stack_base + stack_words <= data_base:
+        addr_bits = None
+    else:
+        stack_base = code_length
+        data_base = stack_base + stack_words
+        addr_bits = max(8, (data_base + data_words).bit_length())
+
+    lines = ["DEF START"] + init + main + ["EOP"]
+    for name, routine in routines:
+        lines += [f"DEF {name}"] + routine
+    lines = [line.replace("#DATA", f"#{data_base}") for line in lines]
+
+    calls = sum(1 for line in main if line == "CALL F1")
+    executed = len(init) + len(main) + 1 + calls * chain
+    return Workload(lines, executed, addr_bits, stack_base, data_base)